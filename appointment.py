@@ -3,19 +3,19 @@ from llama_index.core.base.llms.types import ChatMessage
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.llms.ollama import Ollama
-from booking_message import format_booking_message
+from booking_message import format_booking_message, format_no_slot_message
+from doctor_index import load_or_build_index
 from database.doctor_database import DoctorDB
 from database.patient_database import BookingManager
 from prompts import *
 from regex import get_booking_data
-from llama_index.core import SimpleDirectoryReader, Settings
-from llama_index.core import VectorStoreIndex
+from llama_index.core import Settings
 from llama_index.core.chat_engine.types import ChatMode
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 from llama_index.core.prompts import RichPromptTemplate
-from llama_index.core.storage.chat_store import SimpleChatStore
 from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.llms.google_genai import GoogleGenAI
+from jsonl_chat_store import JsonlChatStore
 from tts_stt.ai_voice_call import Piper
 from vosk_test import VoskSpeech
 
@@ -50,7 +50,8 @@ tts = Piper('tts_stt/piper_tts_model/en_US-lessac-medium.onnx')
 stt = VoskSpeech('tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4')
 
 # chat store setup *for chat history (memory) management
-chat_store = SimpleChatStore()
+# append-only log: each turn appends its messages instead of rewriting chat_store.json
+chat_store = JsonlChatStore(path="chat_store.jsonl")
 chat_memory = ChatMemoryBuffer.from_defaults(
     token_limit=3000,
     chat_store=chat_store,
@@ -65,10 +66,8 @@ chat_memory = ChatMemoryBuffer.from_defaults(
 
 splitter = SentenceSplitter(chunk_size=512, chunk_overlap=50)
 
-documents = SimpleDirectoryReader("data").load_data()
-nodes = splitter.get_nodes_from_documents(documents)
-
-index = VectorStoreIndex(nodes)
+# persisted index, re-embedded incrementally only for changed files in data/
+index = load_or_build_index("data", persist_dir="storage/doctor_index_split", transformations=[splitter])
 
 # formatting prompt as template
 text_booking_template = RichPromptTemplate(chat_text_booking_prompt_str)
@@ -110,15 +109,13 @@ def chat_with_gemini():
                 # tts.get_and_speak("Didn't catch you there. Can you say it again?")
             else:
                 # tts.get_and_speak_non_blocking(f"You Said: {user_input}")
-                response = chat_engine.chat(user_input, )
+                # the date goes with the message, not into the (import-time) system prompt
+                response = chat_engine.chat(f"{dynamic_context()}\n{user_input}")
                 # print("here2")
-                history = chat_store.get_messages("user1")
                 res_text = response.response.strip().replace("*", "")
-                if "BOOKING_CONFIRMATION" in res_text:
-                    # format booking data
-                    booking_data = get_booking_data(res_text)
-                    print(booking_data['date'])
-
+                # format booking data (None when there is no complete BOOKING_CONFIRMATION block)
+                booking_data = get_booking_data(res_text)
+                if booking_data:
                     # book data
                     final_data = booking_manager.book_earliest(patient_name=booking_data['patient'],
                                                                patient_age=int(booking_data['age']),
@@ -126,19 +123,21 @@ def chat_with_gemini():
                                                                date_str=booking_data['date'],
                                                                time=booking_data['time'])
 
-                    res_text = format_booking_message(final_data)
+                    if final_data:
+                        res_text = format_booking_message(final_data)
+                    else:
+                        res_text = format_no_slot_message(booking_data['doctor'])
                     # history.pop()
 
-                # print(history)
-                history.pop()
-                history.append(ChatMessage(role = 'assistant', content=res_text))
-                chat_store.set_messages("user1", history)
+                # keep the spoken/booked text as the assistant turn (two log lines, no history copy)
+                if res_text != response.response:
+                    chat_store.delete_last_message("user1")
+                    chat_store.add_message("user1", ChatMessage(role='assistant', content=res_text))
                 wrapped_text = textwrap.fill(res_text, width=100)
                 print("Bot:", wrapped_text)
                 # tts.get_and_speak(res_text)
                 # print("Bot:", response.response.strip())
                 # print(booking_manager.list_bookings_for_day())
-                chat_store.persist(persist_path="chat_store.json")
         except Exception as e:
             print(f"couldn't hear that {e}")
             # tts.get_and_speak("Didn't catch you there. Can you say it again?")
@@ -1,65 +1,16 @@
-import os, time, threading, queue
+import os, time, threading
 import random
 import pygame
 from dataclasses import dataclass
-from typing import Dict, List, Optional
-from llama_index.embeddings.ollama import OllamaEmbedding
-from booking_message import format_booking_message
-from database.doctor_database import DoctorDB
-from database.patient_database import BookingManager
-from prompts import SYSTEM_PROMPT, chat_text_booking_prompt_str, chat_refine_booking_prompt_str
-from regex import get_booking_data
-from tts_stt.ai_voice_call import Piper
-from vosk_test import VoskSpeech
-from llama_index.core import Settings, SimpleDirectoryReader, VectorStoreIndex
-from llama_index.core.chat_engine.types import ChatMode
-from llama_index.llms.ollama import Ollama
-from llama_index.core.prompts import RichPromptTemplate
-from llama_index.core.storage.chat_store import SimpleChatStore
-from llama_index.core.memory import ChatMemoryBuffer
-
-# ============ LLM CONFIG ============
-Settings.embed_model = OllamaEmbedding(model_name='nomic-embed-text')
-
-Settings.llm = Ollama(
-    model="gemma3:4b",
-    base_url="http://localhost:11434/",
-    request_timeout=45.0,
-    additional_kwargs={
-        "num_ctx": 2048,
-        "num_predict": 256,
-        "temperature": 0.2,
-        "thinking": {"enabled": False},
-    },
-)
-
-# ============ RAG (Doctor's List) ============
-docs = SimpleDirectoryReader("data").load_data()
-index = VectorStoreIndex.from_documents(docs)
-chat_store = SimpleChatStore()
-chat_memory = ChatMemoryBuffer.from_defaults(token_limit=3000, chat_store=chat_store, chat_store_key="user1")
-
-
-
-# ============ Chat Engine Setup ============
-text_booking_template = RichPromptTemplate(chat_text_booking_prompt_str)
-refine_template = RichPromptTemplate(chat_refine_booking_prompt_str)
-
-chat_engine = index.as_chat_engine(
-    memory=chat_memory,
-    system_prompt=SYSTEM_PROMPT,
-    similarity_top_k=4,
-    chat_mode=ChatMode.CONTEXT,
-    streaming=True,
-)
-
-# ============ Database Setup ============
-# db = DoctorDB(); db.load_from_json_file('data/doctors_list.json')
-# booking_manager = BookingManager()
-
-# ============ Speech to Text and Text to Speech ============
-tts = Piper('tts_stt/piper_tts_model/en_US-lessac-medium.onnx')
-stt = VoskSpeech('tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4')  # has start_listen/stop_listen
+from typing import Dict, List, Optional, Tuple
+from booking_message import format_booking_message, format_no_slot_message, BOOKED_TAIL
+from emotion_frames import EmotionFrames
+from intent_router import SessionState
+from regex import BookingExtractor, get_booking_data_json
+from startup import Startup
+from turn_trace import JsonlExporter, PrometheusExporter, Tracer
+from tts_stt.audio_scheduler import ANSWER, ERROR
+from tts_stt.speech_stream import SpeechStream
 
 thinking_string = [
 "Got it — let me check.",
@@ -75,6 +26,97 @@ thinking_string = [
 "Got it—working on this.",
 ]
 
+GREETING = "Hello! How can I help you?"
+FAREWELL = "You are welcome! Have a nice day."
+
+# barge-in: keep the mic live while speaking and cut playback as soon as the user talks.
+# Needs echo cancellation (headset / AEC mic), otherwise the assistant interrupts itself.
+BARGE_IN = False
+
+# ============ Turn tracing ============
+# one record per turn (stt endpointing, routing, memory, LLM rounds, tools, tts, playback, ttft,
+# time-to-first-audio, tok/s): appended to storage/turn_traces.jsonl. Set CLINIC_METRICS_PORT
+# to also serve them for Prometheus on 127.0.0.1 (off by default)
+METRICS_PORT = int(os.environ["CLINIC_METRICS_PORT"]) if os.environ.get("CLINIC_METRICS_PORT") else None
+tracer = Tracer([JsonlExporter("storage/turn_traces.jsonl")])
+
+# ============ Startup ============
+# Independent resources load in parallel on a pool. The greeting only needs TTS and the mic;
+# the LLM side (llama-index import, database, chat engine) finishes while it is being spoken.
+startup = Startup(max_workers=3)
+tts = stt = None
+db = booking_manager = chat_memory = chat_engine = router = None
+
+
+def _load_tts():
+    global tts
+    from tts_stt.ai_voice_call import Piper  # onnxruntime import is part of the cost
+    tts = Piper('tts_stt/piper_tts_model/en_US-lessac-medium.onnx')
+    tts.prewarm([GREETING, FAREWELL, BOOKED_TAIL, *thinking_string])
+
+
+def _load_stt():
+    global stt
+    from vosk_test import VoskSpeech
+    stt = VoskSpeech('tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4')  # has start_listen/stop_listen
+
+
+def _load_chat():
+    global db, booking_manager, chat_memory, chat_engine, router
+    # llama-index takes seconds to import on the Pi, so it is imported here, off the main thread
+    from availability_engine import AvailabilityChatEngine, build_availability_tools, describe_availability
+    from database.doctor_database import DoctorDB
+    from database.patient_database import BookingManager
+    from intent_router import IntentRouter
+    from prompts import static_system_prompt
+    from summary_memory import SummaryMemory
+    from llama_index.core import Settings
+    from llama_index.llms.ollama import Ollama
+    from llama_index.core.storage.chat_store import SimpleChatStore
+
+    # ============ LLM CONFIG ============
+    Settings.llm = Ollama(
+        model="gemma3:4b",
+        base_url="http://localhost:11434/",
+        request_timeout=45.0,
+        additional_kwargs={
+            "num_ctx": 2048,
+            "num_predict": 256,
+            "temperature": 0.2,
+            "thinking": {"enabled": False},
+        },
+    )
+
+    # ============ Database Setup ============
+    db = DoctorDB(); db.load_from_json_file('data/doctors_list.json')
+    booking_manager = BookingManager()
+
+    # ============ Chat Engine Setup ============
+    # availability is looked up live through tools; no embedding retrieval per turn.
+    # memory = structured summary + last 3 exchanges, so the prompt stays well under num_ctx=2048
+    # however long the conversation gets; older turns are folded into the structured summary.
+    # llm=None: an LLM summary would run on the same single-slot Ollama, queue ahead of the next
+    # turn and replace the cached static prompt prefix
+    chat_store = SimpleChatStore()
+    chat_memory = SummaryMemory(chat_store=chat_store, chat_store_key="user1", keep_turns=3, llm=None)
+
+    chat_engine = AvailabilityChatEngine(
+        llm=Settings.llm,
+        tools=build_availability_tools(db, booking_manager),
+        memory=chat_memory,
+        system_prompt=static_system_prompt(db.get_all()),
+        # gemma3 has no tool template in Ollama; it gets the same live table inlined instead
+        fallback_context=lambda: describe_availability(booking_manager.doctor_availability()),
+    )
+
+    # rule-based fast path for slot values and yes/no; only free-form turns reach the LLM
+    router = IntentRouter(booking_manager)
+
+
+startup.submit("tts (piper)", _load_tts)
+startup.submit("stt (vosk)", _load_stt)
+startup.submit("chat engine", _load_chat)
+
 # ================== UI  ==================
 @dataclass
 class UIState:
@@ -92,47 +134,65 @@ class EmotionDisplay:
         self.font = pygame.font.Font(font_path, font_size)
         self.text_color = text_color
         self.emotion_root = emotion_root
-        self.animations: Dict[str, List[pygame.Surface]] = {}
+        # idle stays resident; other emotions load on first use, at most two sets in RAM
+        # pre-scaled frames on disk: later boots skip PNG decode + smoothscale
+        self.frames = EmotionFrames(emotion_root, self.screen.get_size(), max_sets=2,
+                                    cache_dir="storage/emotion_cache")
+        self.idle_frames = self.frames.get("idle", wait=True)
+        if not self.idle_frames:
+            raise RuntimeError("Missing 'idle' emotion folder with PNG frames.")
         self.frame_index = 0
         self.frame_timer = 0.0
         self.seconds_per_frame = 1.0 / 10.0  # 10fps per-emotion animation
         self.current_emotion = "idle"
-        self._load_all()
+        self.current_frames = self.idle_frames
+        # the greeting is spoken before anything else happens
+        # decoded on the frames' own thread right away (the startup pool is busy with the loaders);
+        # converted on first get() from this (display) thread
+        startup.track("emotion frames", self.frames.load("speaking"))
 
         # text wrap area (80% screen width)
         self.max_text_width = int(self.screen.get_width() * 0.85)
-
-    def _load_all(self):
-        # Preload all emotions subfolders
-        for emotion in os.listdir(self.emotion_root):
-            folder = os.path.join(self.emotion_root, emotion)
-            if not os.path.isdir(folder):
-                continue
-            frames = []
-            for f in sorted(os.listdir(folder)):
-                if not f.lower().endswith(".png"):
-                    continue
-                img = pygame.image.load(os.path.join(folder, f)).convert_alpha()
-                img = pygame.transform.smoothscale(img, self.screen.get_size())
-                frames.append(img)
-            if frames:
-                self.animations[emotion] = frames
-        if "idle" not in self.animations:
-            raise RuntimeError("Missing 'idle' emotion folder with PNG frames.")
+        self.line_gap = 8
+        self.max_lines = 8
+
+        # render cache: text is re-wrapped/re-rendered only when it changes
+        self._text = ""
+        self._lines: List[str] = []                     # wrapped tail of self._text
+        self._line_surfs: Dict[str, pygame.Surface] = {}
+        self._text_blits: List[Tuple[pygame.Surface, pygame.Rect]] = []
+        self._text_rect: Optional[pygame.Rect] = None
+        self._full_redraw = True
+
+        # frame-time stats (work per pump, excluding the sleep in clock.tick)
+        self.stats_every = 30.0
+        self._stats = {"pumps": 0, "full": 0, "partial": 0, "work_ms": 0.0, "max_ms": 0.0}
+        self._stats_t0 = time.perf_counter()
 
     def set_emotion(self, emotion: str):
-        if emotion not in self.animations:
-            emotion = "idle"
-        if emotion != self.current_emotion:
-            self.current_emotion = emotion
+        # frames not resident yet: keep showing idle, the loader thread brings them in
+        frames = self.frames.get(emotion) or self.idle_frames
+        if frames is not self.current_frames:
+            self.current_emotion = emotion if frames is not self.idle_frames else "idle"
+            self.current_frames = frames
             self.frame_index = 0
             self.frame_timer = 0.0
+            self._full_redraw = True
 
+    # ---------- Text ----------
     def wrap_lines(self, text: str) -> List[str]:
-        if not text:
-            return []
-        words = text.split()
-        lines, cur = [], ""
+        """
+        Word-wrap text to max_text_width, keeping the last max_lines lines.
+        - streamed text only grows, so only the last line plus the new tail is re-measured
+        - anything else (set_text, clear) wraps from scratch
+        """
+        if text.startswith(self._text) and self._lines:
+            lines = self._lines[:-1]
+            gap = " " if self._text[-1].isspace() else ""   # "hello " + "world" is two words
+            words = (self._lines[-1] + gap + text[len(self._text):]).split()
+        else:
+            lines, words = [], text.split()
+        cur = ""
         for w in words:
             test = (cur + " " + w).strip()
             width, _ = self.font.size(test)
@@ -142,32 +202,80 @@ class EmotionDisplay:
                 lines.append(cur)
                 cur = w
         if cur: lines.append(cur)
-        return lines[-8:]  # keep last few lines
-
-    def draw(self, text: str):
-        # background emotion frame
-        frames = self.animations.get(self.current_emotion, self.animations["idle"])
-        self.screen.blit(frames[self.frame_index], (0, 0))
-
-        # overlay text (bottom-centered block)
-        if text:
-            lines = self.wrap_lines(text)
-            h = self.screen.get_height()
-            y = h - (len(lines) * (self.font.get_height() + 8)) - 40
-            for line in lines:
-                surf = self.font.render(line, True, self.text_color)
-                rect = surf.get_rect(center=(self.screen.get_width() // 2, y))
-                self.screen.blit(surf, rect)
-                y += self.font.get_height() + 8
+        return lines[-self.max_lines:]  # keep last few lines
+
+    def _set_text(self, text: str) -> Optional[pygame.Rect]:
+        """Re-layout the overlay if text changed; returns the screen area that needs repainting."""
+        if text == self._text:
+            return None
+        self._lines = self.wrap_lines(text) if text else []
+        self._text = text
+        # only new/changed lines hit font.render; usually just the last one
+        surfs = {line: self._line_surfs.get(line) or self.font.render(line, True, self.text_color)
+                 for line in self._lines}
+        self._line_surfs = surfs
+
+        old_rect = self._text_rect
+        step = self.font.get_height() + self.line_gap
+        y = self.screen.get_height() - len(self._lines) * step - 40
+        self._text_blits = []
+        for line in self._lines:
+            surf = surfs[line]
+            self._text_blits.append((surf, surf.get_rect(center=(self.screen.get_width() // 2, y))))
+            y += step
+        self._text_rect = self._text_blits[0][1].unionall([r for _, r in self._text_blits[1:]]) \
+            if self._text_blits else None
+        if old_rect and self._text_rect:
+            return old_rect.union(self._text_rect)
+        return old_rect or self._text_rect
+
+    # ---------- Rendering ----------
+    def draw(self, text: str) -> List[pygame.Rect]:
+        """
+        Paint whatever changed since the last call and return the dirty rectangles.
+        - new animation frame or emotion: the whole screen
+        - text only: background and text inside the old and new text areas
+        - nothing: no painting at all
+        """
+        dirty = self._set_text(text)
+        frame = self.current_frames[self.frame_index]
+        if self._full_redraw:
+            self._full_redraw = False
+            self.screen.blit(frame, (0, 0))
+            self.screen.blits(self._text_blits, doreturn=False)
+            return [self.screen.get_rect()]
+        if dirty is None:
+            return []
+        self.screen.blit(frame, dirty, area=dirty)   # restore the background under the old text
+        self.screen.blits(self._text_blits, doreturn=False)
+        return [dirty]
 
     def update(self, dt: float):
         # advance animation
         self.frame_timer += dt
         if self.frame_timer >= self.seconds_per_frame:
             self.frame_timer -= self.seconds_per_frame
-            self.frame_index = (self.frame_index + 1) % len(self.animations[self.current_emotion])
+            self.frame_index = (self.frame_index + 1) % len(self.current_frames)
+            self._full_redraw = True
+
+    def _record(self, work_ms: float, dirty: List[pygame.Rect]):
+        st = self._stats
+        st["pumps"] += 1
+        st["work_ms"] += work_ms
+        st["max_ms"] = max(st["max_ms"], work_ms)
+        if dirty:
+            st["full" if dirty[0] == self.screen.get_rect() else "partial"] += 1
+        elapsed = time.perf_counter() - self._stats_t0
+        if self.stats_every and elapsed >= self.stats_every:
+            print(f"ui: {st['pumps'] / elapsed:.0f} pumps/s, {st['full'] / elapsed:.1f} full + "
+                  f"{st['partial'] / elapsed:.1f} partial updates/s, "
+                  f"work avg {st['work_ms'] / max(st['pumps'], 1):.2f} ms max {st['max_ms']:.1f} ms "
+                  f"({st['work_ms'] / 10 / elapsed:.1f}% of a core)")
+            self._stats = {"pumps": 0, "full": 0, "partial": 0, "work_ms": 0.0, "max_ms": 0.0}
+            self._stats_t0 = time.perf_counter()
 
     def pump(self, ui: UIState):
+        t0 = time.perf_counter()
         # handle events (must be in main thread)
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
@@ -175,134 +283,275 @@ class EmotionDisplay:
             elif e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                 ui.running = False
         self.set_emotion(ui.emotion)
-        self.draw(ui.text)
-        pygame.display.flip()
+        dirty = self.draw(ui.text)
+        if dirty:
+            pygame.display.update(dirty)   # nothing changed: no flip at all
+        self._record((time.perf_counter() - t0) * 1000, dirty)
         self.update(self.clock.tick(self.fps) / 1000.0)
 
 # ================== THREAD COMMUNICATION ==================
-# Commands UI thread can receive
-@dataclass
-class UICommand:
-    emotion: Optional[str] = None
-    append_text: Optional[str] = None   # add tokens gradually
-    set_text: Optional[str] = None      # overwrite
-    clear_text: bool = False
+class UIChannel:
+    """
+    Latest-state channel from the conversation thread to the render loop.
+    - emotion: last write wins, a burst of changes costs nothing until the next frame
+    - text: appended tokens wait in a list and are joined once per frame, so a long streamed answer
+      costs one concat per rendered frame instead of one per token
+    - snapshot() copies the state into UIState at most once per frame; unchanged -> no work
+    The lock covers a few assignments (and one concat in snapshot); writers never wait on drawing.
+    """
+
+    def __init__(self, emotion: str = "idle"):
+        self._lock = threading.Lock()
+        self._emotion = emotion
+        self._text = ""
+        self._pending: List[str] = []
+        self._version = 0
+        self._seen = -1
+
+    def set_emotion(self, name: str):
+        with self._lock:
+            if name != self._emotion:
+                self._emotion = name
+                self._version += 1
+
+    def set_text(self, text: str):
+        with self._lock:
+            self._text, self._pending = text, []
+            self._version += 1
+
+    def append_text(self, text: str):
+        if not text:
+            return
+        with self._lock:
+            self._pending.append(text)
+            self._version += 1
+
+    def snapshot(self, ui: UIState) -> bool:
+        with self._lock:
+            if self._version == self._seen:
+                return False
+            if self._pending:
+                self._text += "".join(self._pending)
+                self._pending = []
+            self._seen = self._version
+            ui.emotion, ui.text = self._emotion, self._text
+        return True
 
 # ================== APP CONTROLLER ==================
 class App:
     def __init__(self):
         self.ui = UIState()
-        self.display = EmotionDisplay(emotion_root="emotions", fps=60, font_size=40)
+        with startup.timed("display (pygame)"):   # pygame wants the main thread
+            self.display = EmotionDisplay(emotion_root="emotions", fps=60, font_size=40)
+
+        self.session = SessionState()
 
-        self.cmd_q: "queue.Queue[UICommand]" = queue.Queue()
+        self.channel = UIChannel()
+        if METRICS_PORT:
+            try:
+                tracer.exporters.append(PrometheusExporter(host="127.0.0.1", port=METRICS_PORT))
+            except OSError as e:   # port taken: run without the endpoint
+                print(f"metrics endpoint on port {METRICS_PORT} unavailable:", e)
         self.worker = threading.Thread(target=self.conversation_loop, daemon=True)
 
     # ---- helpers to talk to UI (thread-safe) ----
     def ui_set_emotion(self, name: str):
-        self.cmd_q.put(UICommand(emotion=name))
+        self.channel.set_emotion(name)
 
     def ui_set_text(self, text: str):
-        self.cmd_q.put(UICommand(set_text=text))
+        self.channel.set_text(text)
 
     def ui_append_text(self, text: str):
-        self.cmd_q.put(UICommand(append_text=text))
+        self.channel.append_text(text)
 
     def ui_clear(self):
-        self.cmd_q.put(UICommand(clear_text=True))
+        self.channel.set_text("")
 
     # ---- conversation orchestration in background ----
     def conversation_loop(self):
-        # greeting (TTS blocks; keep mic muted)
-        self.ui_set_emotion("idle")
-        # stt.stop_listen()
-        tts.get_and_speak("Hello! How can I help you?")   # Piper blocking speak method name may be .say or .speak
-        time.sleep(0.15)
+        try:
+            self._start_conversation()
+        except Exception as e:
+            # a loader that failed re-raises here; without this the kiosk would idle forever
+            print("startup failed:", e)
+            self.ui_set_emotion("error")
+            self.ui_set_text(f"Startup failed: {e}")
+            time.sleep(5)   # long enough to read before the window closes
+            self.ui.running = False
+            return
 
         while self.ui.running:
             # 1) LISTEN
             self.ui_set_emotion("idle")
             self.ui_set_text("")  # clear
-            user_text = stt.get_text_from_speech()  # waits for speech + silence
+            user_text = stt.get_text_from_speech()  # waits for speech + silence (resumes the mic)
             if not self.ui.running:
                 break
             if not user_text:
-                continue
-            if user_text.strip().lower() in ("exit", "quit", "bye", "thank you"):
-                self.ui_set_emotion("speaking")
-                self.ui_set_text("Goodbye!")
-                tts.get_and_speak("You are welcome! Have a nice day.")
-                self.ui.running = False
-                break
-
-            # 2) THINK (LLM)
-            self.ui_set_emotion("thinking")
-            think = random.choice(thinking_string)
-            tts.get_and_speak_non_blocking(f"You Said: {user_text}. {think}")
-            self.ui_set_text(think)
-
-            # Stream tokens so the screen updates live
+                continue  # stay unmuted: muting would drop speech that just started
+            if not BARGE_IN:
+                stt.stop_listen()  # mute while thinking/speaking; capture keeps running
+            turn = None
             try:
-                resp = chat_engine.stream_chat(user_text)  # returns StreamingAgentChatResponse
-                answer = []
-                self.ui_set_text("")
-                for token in resp.response_gen:  # iterate the generator, not resp
-                    answer.append(token)
-                    self.ui_append_text(token)  # update your UI incrementally
-                res_text = "".join(answer).strip().replace("*", "")
+                turn = self._start_turn(user_text)
+                if not self._turn(user_text, turn):
+                    break
             except Exception as e:
-                res_text = f"(error) {e}"
-                self.ui_set_emotion("speaking")
-
-            # 3) BOOK if confirmation present (your guard/regex)
-            if "BOOKING_CONFIRMATION" in res_text:
-                try:
-                    data = get_booking_data(res_text)
-                    booked = {
-                        "patient": data["patient"],
-                        "age": int(data["age"]),
-                        "doctor": data["doctor"],
-                        "date": data["date"],
-                        "time": data["time"],
-                    }
-                    # booked = booking_manager.book_earliest(
-                    #     patient_name=data["patient"],
-                    #     patient_age=int(data["age"]),
-                    #     doctor_name=data["doctor"],
-                    #     date_str=data["date"],
-                    #     time=data["time"],
-                    # )
-                    res_text = format_booking_message(booked)
-                except Exception as e:
-                    res_text = f"Booking error: {e}"
-                    self.ui_set_emotion("error")
+                # a failing router / database step costs this turn, not the kiosk
+                print("turn failed:", e)
+                if turn is not None:
+                    turn.attrs["error"] = repr(e)
+                self.ui_set_emotion("error")
+                self.ui_set_text("Sorry, something went wrong. Please try again.")
+            finally:
+                chat_engine.trace = None
+                if turn is not None:
+                    tracer.finish(turn)
+
+    def _start_conversation(self):
+        """Wait for the loaders and speak the greeting; raises if a component failed to load."""
+        # greeting (TTS blocks; keep mic muted)
+        self.ui_set_emotion("idle")
+        startup.wait("tts (piper)")
+        startup.wait("stt (vosk)")
+        tts.on_synthesized = lambda text, start, end: tracer.add("tts", start, end)
+        # filler ("You said ...") starts early on purpose; ttfa is the first answer audio
+        tts.scheduler.on_play = lambda priority: tracer.mark(
+            "first_audio" if priority >= ANSWER else "first_filler_audio")
+        if BARGE_IN:
+            stt.on_speech_start = tts.scheduler.cancel
+        else:
+            stt.stop_listen()
+        startup.mark("greeting")
+        tts.get_and_speak(GREETING)   # Piper blocking speak method name may be .say or .speak
+        time.sleep(0.15)
+
+        # the LLM side normally finished while the greeting played
+        startup.wait("chat engine")
+        chat_memory.state = self.session   # summary reads name/age/doctor/booking from here
+        startup.report()
+        startup.save_report()
 
-            # 4) SPEAK (and then go back to listening)
+    def _turn(self, user_text: str, turn) -> bool:
+        """One exchange after the user spoke; False ends the conversation."""
+        if user_text.strip().lower() in ("exit", "quit", "bye", "thank you"):
             self.ui_set_emotion("speaking")
-            # Replace screen text with the final message (keeps it short if LLM rambled)
-            self.ui_set_text(res_text)
-            tts.get_and_speak(res_text)   # block; mic muted
+            self.ui_set_text("Goodbye!")
+            with turn.span("playback"):
+                tts.get_and_speak(FAREWELL)
+            turn.attrs["path"] = "exit"
+            self.ui.running = False
+            return False
+
+        # 2) FAST PATH: names, ages, doctors and yes/no are answered without the LLM
+        with turn.span("route"):
+            routed = router.route(user_text, self.session)
+        if routed:
+            # keep the LLM's view of the conversation complete for later turns
+            chat_memory.add_turn(user_text, routed.reply)
+            self.ui_set_emotion("speaking")
+            self.ui_set_text(routed.reply)
+            with turn.span("playback"):
+                tts.get_and_speak(routed.reply)
+            turn.attrs["path"] = "fast"
             time.sleep(0.2)
-            # stt.start_listen()
             self.ui_set_emotion("idle")
-            # leave the last message on screen until next input
+            return True
+
+        # 3) THINK (LLM)
+        self.ui_set_emotion("thinking")
+        think = random.choice(thinking_string)
+        tts.get_and_speak_non_blocking(f"You Said: {user_text}. {think}")
+        self.ui_set_text(think)
+
+        # Stream tokens so the screen updates live, and speak each sentence as soon as it is complete
+        speech = SpeechStream(tts)
+        extractor = BookingExtractor()   # spots the confirmation block while tokens stream in
+        priority = ANSWER
+        chat_engine.trace = turn
+        try:
+            resp = chat_engine.stream_chat(user_text)  # returns StreamingAgentChatResponse
+            answer = []
+            self.ui_set_text("")
+            first = True
+            llm_start = time.perf_counter()
+            for token in resp.response_gen:  # iterate the generator, not resp
+                if first:
+                    self.ui_set_emotion("speaking")
+                    first = False
+                turn.token()
+                answer.append(token)
+                self.ui_append_text(token)  # update your UI incrementally
+                speech.feed(token)
+                extractor.feed(token)
+            turn.add("llm", llm_start, time.perf_counter())
+            res_text = "".join(answer).strip().replace("*", "")
+            streamed = True
+            router.observe_reply(res_text, self.session)   # the doctor it recommended, for the fast path
+        except Exception as e:
+            res_text = f"(error) {e}"
+            streamed = False
+            priority = ERROR
+            self.ui_set_emotion("speaking")
+        speech.close()
+
+        # 4) BOOK if confirmation present (your guard/regex)
+        booked = None
+        if extractor.detected:
+            booking_start = time.perf_counter()
+            try:
+                # garbled block: let the model restate it as schema-constrained JSON
+                data = extractor.close() or get_booking_data_json(res_text)
+                if data is None:
+                    raise ValueError("could not read the booking details")
+                # the slot is allocated by the database, the LLM's Time: is only a hint
+                booked = booking_manager.book_earliest(
+                    patient_name=data["patient"],
+                    patient_age=int(data["age"]),
+                    doctor_name=data["doctor"],
+                    date_str=data["date"],
+                    time=data["time"],
+                )
+                if booked:
+                    self.session.booked(booked)
+                    res_text = format_booking_message(booked)
+                else:
+                    res_text = format_no_slot_message(data["doctor"])
+            except Exception as e:
+                res_text = f"Booking error: {e}"
+                priority = ERROR
+                self.ui_set_emotion("error")
+            turn.add("booking", booking_start, time.perf_counter())
+
+        # 5) SPEAK (and then go back to listening)
+        self.ui_set_emotion("speaking")
+        # Replace screen text with the final message (keeps it short if LLM rambled)
+        self.ui_set_text(res_text)
+        with turn.span("playback"):
+            speech.wait()   # block until the streamed sentences are played; mic muted
+            if not streamed or speech.stopped:
+                # errors and booking messages were not part of the stream
+                tts.get_and_speak(res_text, priority=priority)
+        turn.attrs.update(path="llm", ok=streamed, booked=bool(booked))
+        time.sleep(0.2)
+        self.ui_set_emotion("idle")
+        # leave the last message on screen until next input
+        return True
+
+    def _start_turn(self, user_text: str):
+        # the turn starts when the user stopped talking, so Vosk's endpoint wait is part of it
+        now, utterance = time.perf_counter(), stt.last_utterance
+        t0 = now - (time.time() - utterance.ended) - utterance.silence if utterance else now
+        turn = tracer.start(t0=t0, words=len(user_text.split()))
+        turn.add("stt.endpoint", t0, now)
+        return turn
 
     # ---- main loop on the MAIN thread (required by pygame) ----
     def run(self):
         self.worker.start()
         last_text = ""
         while self.ui.running:
-            # drain command queue → update UIState
-            try:
-                while True:
-                    cmd: UICommand = self.cmd_q.get_nowait()
-                    if cmd.clear_text: self.ui.text = ""
-                    if cmd.set_text is not None: self.ui.text = cmd.set_text
-                    if cmd.append_text is not None:
-                        self.ui.text += cmd.append_text
-                    if cmd.emotion is not None: self.ui.emotion = cmd.emotion
-            except queue.Empty:
-                pass
-
+            self.channel.snapshot(self.ui)   # everything the worker sent since the last frame
             self.display.pump(self.ui)
 
         pygame.quit()
@@ -0,0 +1,157 @@
+from typing import Callable, Generator, List, Optional
+
+from booking_message import format_slot
+from prompts import dynamic_context
+from turn_trace import Turn, trace_span
+from database.doctor_database import DoctorDB
+from database.patient_database import BookingManager
+from llama_index.core.base.llms.types import ChatMessage
+from llama_index.core.tools import FunctionTool
+
+
+def describe_availability(rows) -> str:
+    """Availability rows -> one short line per doctor; this is all the LLM sees of the database."""
+    if not rows:
+        return "No matching doctors."
+    lines = []
+    for r in rows:
+        nxt = format_slot(r["next_date"], r["next_time"]) if r["next_date"] else "fully booked this week"
+        lines.append(f"{r['doctor_name']} | {r['expertise']} | {r['timings']} | "
+                     f"free today: {r['free_today']} | earliest: {nxt}")
+    return "\n".join(lines)
+
+
+def build_availability_tools(db: DoctorDB, booking_manager: BookingManager) -> List[FunctionTool]:
+    """Tools answering from the live calendar, so availability is never a stale embedded copy."""
+    specialties = ", ".join(db.get_specialties())
+
+    def find_doctors(specialty: str = "") -> str:
+        return describe_availability(booking_manager.doctor_availability(expertise=specialty or None))
+
+    def check_doctor(doctor_name: str) -> str:
+        return describe_availability(booking_manager.doctor_availability(doctor_name=doctor_name))
+
+    return [
+        FunctionTool.from_defaults(
+            fn=find_doctors,
+            name="find_doctors",
+            description=(
+                "List doctors of a specialty with visiting hours, free slots today and their earliest "
+                f"free slot. Specialties: {specialties}. Empty specialty lists every doctor."
+            ),
+        ),
+        FunctionTool.from_defaults(
+            fn=check_doctor,
+            name="check_doctor",
+            description="Visiting hours, free slots today and earliest free slot of one doctor, by name.",
+        ),
+    ]
+
+
+class StreamingReply:
+    """Just enough of StreamingAgentChatResponse for the callers: iterate .response_gen."""
+
+    def __init__(self, gen: Generator[str, None, None]):
+        self.response_gen = gen
+
+
+class AvailabilityChatEngine:
+    """
+    Chat engine that looks availability up through tool calls instead of retrieving doctor chunks
+    every turn.
+    - each round streams; a round that ends in tool calls runs them and asks again
+    - only the user message and the final answer go into memory, tool traffic stays out of it
+    - models without tool support (Ollama answers "does not support tools") fall back to a compact
+      live availability table; detected once, then remembered
+    - prompt layout is [static system prompt, history, dynamic suffix, user message]: the system
+      prompt never changes, so Ollama reuses its KV cache and only prefills what is new
+    """
+
+    def __init__(
+        self,
+        llm,
+        tools: List[FunctionTool],
+        memory,  # ChatMemoryBuffer or SummaryMemory: get()/put()
+        system_prompt: str,
+        fallback_context: Optional[Callable[[], str]] = None,
+        max_tool_rounds: int = 2,
+    ):
+        self.llm = llm
+        self.tools = {t.metadata.name: t for t in tools}
+        self.memory = memory
+        self.system_prompt = system_prompt
+        self.fallback_context = fallback_context
+        self.max_tool_rounds = max_tool_rounds
+        self.tools_supported = getattr(llm.metadata, "is_function_calling_model", False)
+        self.trace: Optional[Turn] = None  # set by the caller to time memory, LLM rounds and tools
+
+    def stream_chat(self, message: str) -> StreamingReply:
+        return StreamingReply(self._run(message))
+
+    def chat(self, message: str) -> str:
+        return "".join(self._run(message))
+
+    def _run(self, message: str) -> Generator[str, None, None]:
+        user_msg = ChatMessage(role="user", content=message)
+        with trace_span(self.trace, "memory"):
+            history = self.memory.get(input=message)
+        answer = []
+        if self.tools_supported:
+            try:
+                for token in self._tool_rounds(history, user_msg):
+                    answer.append(token)
+                    yield token
+            except Exception as e:
+                if answer:
+                    raise
+                print("tool calling unavailable, using live context:", e)
+                self.tools_supported = False
+        if not self.tools_supported:
+            extra = "Doctors (live availability):\n" + self.fallback_context() if self.fallback_context else ""
+            messages = self._messages(history, user_msg, extra)
+            with trace_span(self.trace, "llm.round"):
+                for chunk in self.llm.stream_chat(messages):
+                    answer.append(chunk.delta or "")
+                    yield chunk.delta or ""
+
+        self.memory.put(user_msg)
+        self.memory.put(ChatMessage(role="assistant", content="".join(answer)))
+
+    def _messages(self, history, user_msg, extra: str = "") -> List[ChatMessage]:
+        return [
+            ChatMessage(role="system", content=self.system_prompt),
+            *history,
+            ChatMessage(role="system", content=dynamic_context(extra=extra)),
+            user_msg,
+        ]
+
+    def _tool_rounds(self, history, user_msg) -> Generator[str, None, None]:
+        messages = self._messages(history, user_msg)
+        tools = list(self.tools.values())
+        for round_no in range(self.max_tool_rounds + 1):
+            # last round: no tools offered, the model has to answer
+            offer = tools if round_no < self.max_tool_rounds else []
+            response = None
+            with trace_span(self.trace, "llm.round"):
+                stream = (self.llm.stream_chat_with_tools(offer, chat_history=list(messages),
+                                                          allow_parallel_tool_calls=True)
+                          if offer else self.llm.stream_chat(messages))
+                for response in stream:
+                    if response.delta:
+                        yield response.delta
+            if response is None:
+                return
+            calls = self.llm.get_tool_calls_from_response(response, error_on_no_tool_call=False) if offer else []
+            if not calls:
+                return
+
+            messages.append(response.message)
+            for call in calls:
+                tool = self.tools.get(call.tool_name)
+                with trace_span(self.trace, "tools"):
+                    output = tool.call(**call.tool_kwargs).content if tool else f"Unknown tool {call.tool_name}"
+                messages.append(ChatMessage(
+                    role="tool",
+                    content=output,
+                    additional_kwargs={"tool_call_id": call.tool_id, "name": call.tool_name},
+                ))
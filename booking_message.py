@@ -1,11 +1,9 @@
 from datetime import datetime, timedelta
 
-def format_booking_message(data):
-    # Extract date and time from booking_data
-    doctor = data['doctor']
-    date_str = data['date']  # assuming 'YYYY-MM-DD' format
-    time_str = data['time']  # assuming something like '14:30'
+# fixed sentences of every booking message; spoken often enough to keep in the TTS cache
+BOOKED_TAIL = "Please be on time. Is there anything else that I can help you with?"
 
+def _day_label(date_str):
     # Convert date to datetime object
     booking_date = datetime.strptime(date_str, "%Y-%m-%d").date()
     today = datetime.today().date()
@@ -18,7 +16,25 @@ def format_booking_message(data):
         day_label = "tomorrow"
     else:
         day_label = booking_date.strftime("on %A, %B %d")  # e.g., "on Friday, August 15"
+    return day_label
+
+
+def format_slot(date_str, time_str):
+    # '2025-08-15', '11:00' -> '11:00 tomorrow'
+    return f"{time_str} {_day_label(date_str)}"
+
+
+def format_booking_message(data):
+    # Extract date and time from booking_data
+    doctor = data['doctor']
+    date_str = data['date']  # assuming 'YYYY-MM-DD' format
+    time_str = data['time']  # assuming something like '14:30'
+    day_label = _day_label(date_str)
 
     # Final message
-    res_text = f"Okay, I've booked the first available slot with {doctor} at {time_str} {day_label}. Please be on time. Is there anything else that I can help you with?"
+    res_text = f"Okay, I've booked the first available slot with {doctor} at {time_str} {day_label}. {BOOKED_TAIL}"
     return res_text
+
+
+def format_no_slot_message(doctor):
+    return f"Sorry, there are no available slots for {doctor} in the coming days. Is there anything else that I can help you with?"
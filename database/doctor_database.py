@@ -1,40 +1,67 @@
 import json
-import os
-import sqlite3
+from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Iterable, Any
 
-from database.patient_database import BookingManager
+from database.patient_database import BookingManager, _schedule
+from database.storage import default_db_path, get_storage
 
 
 class DoctorDB:
     def __init__(self, db_name: str = "my_database.db", folder_name: str = "db"):
-        # Get the absolute path to the folder where *this script* lives
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        # Define a folder (e.g., "db") inside that directory
-        db_folder = os.path.join(base_dir, folder_name)
-        # Create the folder if it doesn't exist
-        os.makedirs(db_folder, exist_ok=True)
-        # Full path to the database file
-        self.db_path = os.path.join(db_folder, db_name)
-        # Connect to the database
-        self._conn = sqlite3.connect(self.db_path)
-        self._conn.row_factory = sqlite3.Row
+        # Full path to the database file (database/<folder_name>/<db_name>)
+        self.db_path = default_db_path(db_name, folder_name)
+        # WAL connection pool shared with BookingManager
+        self._storage = get_storage(self.db_path)
         # Initialize the table(s)
         self._ensure_table()
     # ---------- Schema ----------
     def _ensure_table(self) -> None:
-        cur = self._conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS doctors (
-            doctor_name TEXT NOT NULL UNIQUE,
-            expertise   TEXT NOT NULL,
-            timings     TEXT NOT NULL,
-            max_slots   INTEGER NOT NULL,
-            slots_remaining INTEGER NOT NULL
-        )
-        """)
-        self._conn.commit()
+        with self._storage.write() as cur:
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS doctors (
+                doctor_name TEXT NOT NULL UNIQUE,
+                expertise   TEXT NOT NULL,
+                timings     TEXT NOT NULL,
+                max_slots   INTEGER NOT NULL,
+                slots_remaining INTEGER NOT NULL
+            )
+            """)
+            # parsed once at ingest: "9:00 AM - 12:00 PM" x 6 -> start 540, 30 min, 6 slots
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS doctor_schedules (
+                doctor_name  TEXT PRIMARY KEY,
+                start_min    INTEGER NOT NULL,   -- minutes after midnight
+                slot_minutes INTEGER NOT NULL,
+                slot_count   INTEGER NOT NULL,
+                gen_from     TEXT,               -- calendar_slots exist for [gen_from, gen_until];
+                gen_until    TEXT                -- NULL until generated / after a schedule change
+            )
+            """)
+            cols = [r[1] for r in cur.execute("PRAGMA table_info(doctor_schedules)").fetchall()]
+            if "gen_from" not in cols:
+                cur.execute("ALTER TABLE doctor_schedules ADD COLUMN gen_from TEXT")
+                cur.execute("ALTER TABLE doctor_schedules ADD COLUMN gen_until TEXT")
+            # availability calendar: doctor x date x slot, ref set once booked (see BookingManager)
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS calendar_slots (
+                doctor_name TEXT NOT NULL,
+                date TEXT NOT NULL,    -- YYYY-MM-DD
+                time TEXT NOT NULL,    -- HH:MM (24h)
+                ref TEXT,              -- bookings.ref, NULL while free
+                PRIMARY KEY (doctor_name, date, time)
+            ) WITHOUT ROWID
+            """)
+            # free slots only: "earliest free slot on/after a date" is an index range scan
+            cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_calendar_free
+            ON calendar_slots(date, time, doctor_name) WHERE ref IS NULL
+            """)
+            # booked slots only: booking / cancelling find their calendar row by ref
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_calendar_ref ON calendar_slots(ref) WHERE ref IS NOT NULL")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_doctors_expertise ON doctors(expertise)")
+            # databases created before the calendar existed
+            self._refresh_schedules(cur)
 
     # ---------- Ingest / Upsert ----------
     def upsert_many(self, doctors: Iterable[Dict[str, Any]]) -> None:
@@ -42,17 +69,45 @@ class DoctorDB:
         Upsert list of dicts with keys:
         doctor_name, expertise, timings, max_slots, slots_remaining
         """
-        cur = self._conn.cursor()
+        with self._storage.write() as cur:
+            cur.executemany("""
+            INSERT INTO doctors (doctor_name, expertise, timings, max_slots, slots_remaining)
+            VALUES (:doctor_name, :expertise, :timings, :max_slots, :slots_remaining)
+            ON CONFLICT(doctor_name) DO UPDATE SET
+                expertise=excluded.expertise,
+                timings=excluded.timings,
+                max_slots=excluded.max_slots,
+                slots_remaining=excluded.slots_remaining
+            """, doctors)
+            self._refresh_schedules(cur)
+
+    @staticmethod
+    def _refresh_schedules(cur) -> None:
+        """
+        Re-derive doctor_schedules from doctors. For a doctor whose schedule changed, the free
+        future calendar rows of the old schedule are dropped (booked ones stay) and the calendar
+        is marked ungenerated, so ensure_calendar rebuilds it from the new schedule.
+        """
+        old = {r["doctor_name"]: (r["start_min"], r["slot_minutes"], r["slot_count"]) for r in cur.execute(
+            "SELECT doctor_name, start_min, slot_minutes, slot_count FROM doctor_schedules").fetchall()}
+        new = {r["doctor_name"]: _schedule(r["timings"], r["max_slots"]) for r in cur.execute(
+            "SELECT doctor_name, timings, max_slots FROM doctors").fetchall()}
+        changed = [name for name, schedule in new.items() if old.get(name) != schedule]
+        if not changed:
+            return
+        today = datetime.now().strftime("%Y-%m-%d")
+        cur.executemany("DELETE FROM calendar_slots WHERE doctor_name = ? AND date >= ? AND ref IS NULL",
+                        [(name, today) for name in changed])
         cur.executemany("""
-        INSERT INTO doctors (doctor_name, expertise, timings, max_slots, slots_remaining)
-        VALUES (:doctor_name, :expertise, :timings, :max_slots, :slots_remaining)
-        ON CONFLICT(doctor_name) DO UPDATE SET
-            expertise=excluded.expertise,
-            timings=excluded.timings,
-            max_slots=excluded.max_slots,
-            slots_remaining=excluded.slots_remaining
-        """, doctors)
-        self._conn.commit()
+            INSERT INTO doctor_schedules (doctor_name, start_min, slot_minutes, slot_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(doctor_name) DO UPDATE SET
+                start_min=excluded.start_min,
+                slot_minutes=excluded.slot_minutes,
+                slot_count=excluded.slot_count,
+                gen_from=NULL,
+                gen_until=NULL
+        """, [(name, *new[name]) for name in changed])
 
     def load_from_json_file(self, json_path: str) -> None:
         data = json.loads(Path(json_path).read_text(encoding="utf-8"))
@@ -61,48 +116,57 @@ class DoctorDB:
         self.upsert_many(data)
 
     # ---------- Queries ----------
+    # slots_remaining is today's free, still-upcoming calendar slots once the calendar covers
+    # today; the legacy counter is only reported for days the calendar hasn't been generated for
+    _SELECT = """
+        SELECT d.doctor_name, d.expertise, d.timings, d.max_slots,
+               CASE WHEN EXISTS (
+                   SELECT 1 FROM calendar_slots c WHERE c.doctor_name = d.doctor_name AND c.date = :today
+               ) THEN (
+                   SELECT COUNT(*) FROM calendar_slots c
+                   WHERE c.doctor_name = d.doctor_name AND c.date = :today
+                     AND c.ref IS NULL AND c.time > :now
+               ) ELSE d.slots_remaining END AS slots_remaining
+        FROM doctors d
+    """
+
+    @staticmethod
+    def _now_params() -> Dict[str, str]:
+        now = datetime.now()
+        return {"today": now.strftime("%Y-%m-%d"), "now": now.strftime("%H:%M")}
+
     def get_all(self) -> List[Dict[str, Any]]:
-        cur = self._conn.cursor()
-        rows = cur.execute("""
-            SELECT doctor_name, expertise, timings, max_slots, slots_remaining
-            FROM doctors
-            ORDER BY doctor_name
-        """).fetchall()
+        with self._storage.read() as cur:
+            rows = cur.execute(self._SELECT + " ORDER BY d.doctor_name", self._now_params()).fetchall()
         return [dict(row) for row in rows]
 
     def get_by_name(self, doctor_name: str) -> Optional[Dict[str, Any]]:
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT doctor_name, expertise, timings, max_slots, slots_remaining
-            FROM doctors WHERE doctor_name = ?
-        """, (doctor_name,)).fetchone()
+        with self._storage.read() as cur:
+            row = cur.execute(self._SELECT + " WHERE d.doctor_name = :name",
+                              {"name": doctor_name, **self._now_params()}).fetchone()
         return dict(row) if row else None
 
+    def get_specialties(self) -> List[str]:
+        with self._storage.read() as cur:
+            rows = cur.execute("SELECT DISTINCT expertise FROM doctors ORDER BY expertise").fetchall()
+        return [row["expertise"] for row in rows]
+
     # ---------- Booking / Slot updates ----------
     def book_slot(self, doctor_name: str, slots: int = 1) -> bool:
         """
         Decrement slots_remaining by `slots` if available.
         Returns True if booked, False if not enough slots or doctor not found.
+        Check and decrement are one conditional UPDATE, so concurrent writers can't oversell.
         """
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT slots_remaining FROM doctors WHERE doctor_name = ?
-        """, (doctor_name,)).fetchone()
-
-        if not row:
-            return False
-
-        remaining = int(row["slots_remaining"])
-        if remaining < slots:
+        with self._storage.write() as cur:
+            cur.execute("""
+                UPDATE doctors
+                SET slots_remaining = slots_remaining - ?
+                WHERE doctor_name = ? AND slots_remaining >= ?
+            """, (slots, doctor_name, slots))
+        if cur.rowcount != 1:
             print('error booking slot')
             return False
-
-        cur.execute("""
-            UPDATE doctors
-            SET slots_remaining = slots_remaining - ?
-            WHERE doctor_name = ?
-        """, (slots, doctor_name))
-        self._conn.commit()
         return True
 
     def cancel_slot(self, doctor_name: str, slots: int = 1) -> bool:
@@ -110,22 +174,12 @@ class DoctorDB:
         Increment slots_remaining by `slots` but never exceed max_slots.
         Returns True if successful, False if doctor not found.
         """
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT max_slots, slots_remaining FROM doctors WHERE doctor_name = ?
-        """, (doctor_name,)).fetchone()
-        if not row:
-            return False
-
-        max_slots = int(row["max_slots"])
-        remaining = int(row["slots_remaining"])
-        new_val = min(max_slots, remaining + slots)
-
-        cur.execute("""
-            UPDATE doctors SET slots_remaining = ? WHERE doctor_name = ?
-        """, (new_val, doctor_name))
-        self._conn.commit()
-        return True
+        with self._storage.write() as cur:
+            cur.execute("""
+                UPDATE doctors SET slots_remaining = MIN(max_slots, slots_remaining + ?)
+                WHERE doctor_name = ?
+            """, (slots, doctor_name))
+        return cur.rowcount == 1
 
     # ---------- JSON export (feed to LLM) ----------
     def to_json(self, pretty: bool = True) -> str:
@@ -137,9 +191,8 @@ class DoctorDB:
 
     # ---------- Cleanup ----------
     def close(self) -> None:
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        # the pool is shared with other DoctorDB/BookingManager instances; just let go of it
+        self._storage = None
 
 
 # -------------------------
@@ -1,10 +1,13 @@
-import os
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple
 import uuid
 import re
 
+from database.storage import default_db_path, get_storage
+
 
 def _parse_timings(timings: str) -> tuple[datetime, datetime]:
     """
@@ -20,94 +23,284 @@ def _parse_timings(timings: str) -> tuple[datetime, datetime]:
     return start_dt, end_dt
 
 
+@lru_cache(maxsize=None)
+def _slot_grid(timings: str, max_slots: int) -> Tuple[str, ...]:
+    """
+    Split the doctor's window into equal blocks count = max_slots -> ('HH:MM', ...) (24h).
+    Only depends on the schedule string, so it is parsed once per doctor, not per booking.
+    """
+    start_dt, end_dt = _parse_timings(timings)
+    total_minutes = int((end_dt - start_dt).total_seconds() // 60)
+    if max_slots <= 0 or total_minutes <= 0:
+        return ()
+    slot_len = total_minutes // max_slots
+    slot_len = max(slot_len, 1)
+    slots = []
+    t = start_dt
+    for _ in range(max_slots):
+        slots.append(t.strftime("%H:%M"))
+        t += timedelta(minutes=slot_len)
+        if t > end_dt:
+            break
+    return tuple(slots)
+
+
+def _schedule(timings: str, max_slots: int) -> Tuple[int, int, int]:
+    """'9:00 AM - 12:00 PM', 6 -> (start_minute, slot_minutes, slot_count), stored per doctor."""
+    grid = _slot_grid(timings, max_slots)
+    if not grid:
+        return 0, 0, 0
+    minutes = [int(t[:2]) * 60 + int(t[3:]) for t in grid]
+    slot_minutes = minutes[1] - minutes[0] if len(minutes) > 1 else 0
+    return minutes[0], slot_minutes, len(grid)
+
+
 def _short_ref() -> str:
     return uuid.uuid4().hex[:8].upper()
 
 
 class BookingManager:
     def __init__(self, db_name: str = "my_database.db", folder_name: str = "db"):
-        # Get absolute path to the folder where this script lives
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # Create full path to the desired database folder
-        db_folder = os.path.join(base_dir, folder_name)
-        os.makedirs(db_folder, exist_ok=True)  # Ensure the folder exists
+        # Full path to the database file (database/<folder_name>/<db_name>)
+        self.db_path = default_db_path(db_name, folder_name)
 
-        # Full path to the database file
-        self.db_path = os.path.join(db_folder, db_name)
-
-        # Connect to the database
-        self._conn = sqlite3.connect(self.db_path)
-        self._conn.row_factory = sqlite3.Row
+        # WAL connection pool shared with DoctorDB
+        self._storage = get_storage(self.db_path)
 
         # Create necessary tables
         self._ensure_tables()
 
     def _ensure_tables(self):
-        cur = self._conn.cursor()
-        # doctors table assumed created by DoctorDB
+        # doctors, doctor_schedules and calendar_slots are created by DoctorDB
+        with self._storage.write() as cur:
+            migrate = self._needs_ref_migration(cur)
+            if migrate:
+                cur.execute("ALTER TABLE bookings RENAME TO bookings_legacy")
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS bookings (
+                ref TEXT PRIMARY KEY,
+                patient_name TEXT NOT NULL,
+                patient_age INTEGER NOT NULL,
+                doctor_name TEXT NOT NULL,
+                expertise TEXT,
+                date TEXT NOT NULL,    -- YYYY-MM-DD
+                time TEXT NOT NULL     -- HH:MM (24h)
+            )
+            """)
+            # one booking per doctor slot; its doctor_name prefix also serves per-doctor lookups
+            cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_slot
+            ON bookings(doctor_name, date, time)
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_date ON bookings(date, doctor_name, time)")
+            if migrate:
+                self._migrate_legacy_bookings(cur)
+
+    @staticmethod
+    def _needs_ref_migration(cur) -> bool:
+        cols = [r[1] for r in cur.execute("PRAGMA table_info(bookings)").fetchall()]
+        return bool(cols) and "ref" not in cols
+
+    @staticmethod
+    def _migrate_legacy_bookings(cur) -> None:
+        """Copy rows from a pre-ref bookings table, giving each a generated ref."""
         cur.execute("""
-        CREATE TABLE IF NOT EXISTS bookings (
-            patient_name TEXT NOT NULL,
-            patient_age INTEGER NOT NULL,
-            doctor_name TEXT NOT NULL,
-            expertise TEXT,
-            date TEXT NOT NULL,    -- YYYY-MM-DD
-            time TEXT NOT NULL     -- HH:MM (24h)
-        )
+            INSERT OR IGNORE INTO bookings (ref, patient_name, patient_age, doctor_name, expertise, date, time)
+            SELECT upper(hex(randomblob(4))), patient_name, patient_age, doctor_name, expertise, date, time
+            FROM bookings_legacy
         """)
-        # cur.execute("""
-        # CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_slot
-        # ON bookings(doctor_name, date, time)
-        # """)
-        self._conn.commit()
+        copied = cur.rowcount
+        legacy = cur.execute("SELECT COUNT(*) FROM bookings_legacy").fetchone()[0]
+        if copied == legacy:
+            cur.execute("DROP TABLE bookings_legacy")
+        else:
+            # double-booked slots can't satisfy idx_unique_slot; keep them around for a human
+            print(f"{legacy - copied} conflicting bookings left in bookings_legacy")
 
     # ---------- Helpers ----------
-    def _get_doctor(self, doctor_name: str) -> Optional[Dict[str, Any]]:
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT doctor_name, expertise, timings, max_slots, slots_remaining
-            FROM doctors WHERE doctor_name = ?
-        """, (doctor_name,)).fetchone()
-        return dict(row) if row else None
+    @contextmanager
+    def _reader(self, cur: Optional[sqlite3.Cursor] = None):
+        """Reuse the caller's transaction cursor if there is one, else borrow a pooled reader."""
+        if cur is not None:
+            yield cur
+        else:
+            with self._storage.read() as rcur:
+                yield rcur
 
-    def _get_existing_times(self, doctor_name: str, date_str: str) -> set[str]:
-        cur = self._conn.cursor()
-        rows = cur.execute("""
-            SELECT time FROM bookings
-            WHERE doctor_name = ? AND date = ?
-            ORDER BY time
-        """, (doctor_name, date_str)).fetchall()
-        return {r["time"] for r in rows}
+    def _get_doctor(self, doctor_name: str, cur: Optional[sqlite3.Cursor] = None) -> Optional[Dict[str, Any]]:
+        # the LLM tends to write "Dr. Fatima Siddiqui (Pediatrician)"
+        doctor_name = re.sub(r"\(.*?\)", "", doctor_name).strip()
+        with self._reader(cur) as cur:
+            row = cur.execute("""
+                SELECT doctor_name, expertise, timings, max_slots, slots_remaining
+                FROM doctors WHERE doctor_name = ? COLLATE NOCASE
+            """, (doctor_name,)).fetchone()
+        return dict(row) if row else None
 
-    def _compute_all_slots(self, timings: str, max_slots: int) -> List[str]:
+    # ---------- Calendar ----------
+    def ensure_calendar(self, days: int = 7, start: Optional[str] = None) -> None:
         """
-        Split the doctor's window into equal blocks count = max_slots.
-        Return list of 'HH:MM' (24h).
+        Rolling generation: make sure every doctor has calendar rows for [start, start + days).
+        Rows come from the precomputed doctor_schedules, entirely in SQL; existing rows are kept.
+        What is already generated is recorded per doctor in doctor_schedules (gen_from/gen_until),
+        so every process sees it and a schedule change (which clears it) triggers a rebuild.
         """
-        start_dt, end_dt = _parse_timings(timings)
-        total_minutes = int((end_dt - start_dt).total_seconds() // 60)
-        if max_slots <= 0 or total_minutes <= 0:
-            return []
-        slot_len = total_minutes // max_slots
-        slot_len = max(slot_len, 1)
-        slots = []
-        t = start_dt
-        for _ in range(max_slots):
-            slots.append(t.strftime("%H:%M"))
-            t += timedelta(minutes=slot_len)
-            if t > end_dt:
-                break
-        return slots
+        start = start or datetime.now().strftime("%Y-%m-%d")
+        last = (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        window = {"start": start, "days": days, "last": last}
+        stale = "slot_count > 0 AND (gen_from IS NULL OR gen_from > :start OR gen_until < :last)"
+        with self._storage.read() as cur:
+            if cur.execute(f"SELECT 1 FROM doctor_schedules WHERE {stale} LIMIT 1", window).fetchone() is None:
+                return
+        with self._storage.write() as cur:
+            cur.execute(f"""
+                WITH RECURSIVE
+                    days(d) AS (
+                        SELECT date(:start)
+                        UNION ALL SELECT date(d, '+1 day') FROM days
+                        WHERE d < date(:start, '+' || (:days - 1) || ' day')
+                    ),
+                    idx(i) AS (
+                        SELECT 0
+                        UNION ALL SELECT i + 1 FROM idx
+                        WHERE i + 1 < (SELECT IFNULL(MAX(slot_count), 0) FROM doctor_schedules)
+                    )
+                INSERT OR IGNORE INTO calendar_slots (doctor_name, date, time)
+                SELECT s.doctor_name, days.d,
+                       printf('%02d:%02d', (s.start_min + idx.i * s.slot_minutes) / 60,
+                                           (s.start_min + idx.i * s.slot_minutes) % 60)
+                FROM doctor_schedules s, days, idx
+                WHERE idx.i < s.slot_count AND {stale}
+            """, window)
+            # bookings made before the calendar covered their date
+            cur.execute("""
+                UPDATE calendar_slots SET ref = (
+                    SELECT b.ref FROM bookings b
+                    WHERE b.doctor_name = calendar_slots.doctor_name
+                      AND b.date = calendar_slots.date AND b.time = calendar_slots.time
+                )
+                WHERE ref IS NULL AND date >= date(:start) AND date < date(:start, '+' || :days || ' day')
+                  AND EXISTS (
+                    SELECT 1 FROM bookings b
+                    WHERE b.doctor_name = calendar_slots.doctor_name
+                      AND b.date = calendar_slots.date AND b.time = calendar_slots.time
+                )
+            """, window)
+            # extend the recorded range; a window that doesn't touch it replaces it
+            cur.execute(f"""
+                UPDATE doctor_schedules SET
+                    gen_from = CASE WHEN gen_from IS NULL OR gen_until < date(:start, '-1 day')
+                                         OR gen_from > date(:last, '+1 day')
+                                    THEN :start ELSE min(gen_from, :start) END,
+                    gen_until = CASE WHEN gen_from IS NULL OR gen_until < date(:start, '-1 day')
+                                          OR gen_from > date(:last, '+1 day')
+                                     THEN :last ELSE max(gen_until, :last) END
+                WHERE {stale}
+            """, window)
 
     # ---------- Availability ----------
     def list_available_slots(self, doctor_name: str, date_str: str) -> List[str]:
         doctor = self._get_doctor(doctor_name)
         if not doctor:
             return []
-        all_slots = self._compute_all_slots(doctor["timings"], int(doctor["max_slots"]))
-        taken = self._get_existing_times(doctor_name, date_str)
-        return [s for s in all_slots if s not in taken]
+        self.ensure_calendar(days=1, start=date_str)
+        with self._storage.read() as cur:
+            rows = cur.execute("""
+                SELECT time FROM calendar_slots
+                WHERE doctor_name = ? AND date = ? AND ref IS NULL
+                ORDER BY time
+            """, (doctor["doctor_name"], date_str)).fetchall()
+        return [r["time"] for r in rows]
+
+    def _earliest_free_sql(self, cur, where: str, params: Dict[str, Any]) -> Optional[sqlite3.Row]:
+        now = datetime.now()
+        params = {"today": now.strftime("%Y-%m-%d"), "now": now.strftime("%H:%M"), **params}
+        return cur.execute(f"""
+            SELECT c.doctor_name, d.expertise, c.date, c.time
+            FROM calendar_slots c JOIN doctors d ON d.doctor_name = c.doctor_name
+            WHERE c.ref IS NULL
+              AND c.date >= :first AND c.date < :until
+              AND (c.date > :today OR c.time > :now)
+              AND {where}
+            ORDER BY c.date, c.time
+            LIMIT 1
+        """, params).fetchone()
+
+    def earliest_free_slot(
+        self,
+        expertise: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        days: int = 7,
+        date_str: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Earliest bookable slot within `days` days from date_str (default today), optionally
+        restricted to one doctor or to a specialty ("Cardiologist"). Answered by one indexed query.
+        """
+        first = max(date_str or "", datetime.now().strftime("%Y-%m-%d"))
+        self.ensure_calendar(days=days, start=first)
+        until = (datetime.strptime(first, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+        where, params = "1 = 1", {"first": first, "until": until}
+        if doctor_name:
+            where += " AND c.doctor_name = :doctor COLLATE NOCASE"
+            params["doctor"] = re.sub(r"\(.*?\)", "", doctor_name).strip()
+        if expertise:
+            where += " AND d.expertise = :expertise COLLATE NOCASE"
+            params["expertise"] = expertise
+        with self._storage.read() as cur:
+            row = self._earliest_free_sql(cur, where, params)
+        return dict(row) if row else None
+
+    def free_slot_counts(self, days: int = 7, expertise: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Free slots per doctor per day for the next `days` days (past times today excluded)."""
+        now = datetime.now()
+        first = now.strftime("%Y-%m-%d")
+        self.ensure_calendar(days=days, start=first)
+        until = (now + timedelta(days=days)).strftime("%Y-%m-%d")
+        with self._storage.read() as cur:
+            rows = cur.execute("""
+                SELECT c.doctor_name, d.expertise, c.date, COUNT(*) AS free_slots
+                FROM calendar_slots c JOIN doctors d ON d.doctor_name = c.doctor_name
+                WHERE c.ref IS NULL AND c.date >= :first AND c.date < :until
+                  AND (c.date > :first OR c.time > :now)
+                  AND (:expertise IS NULL OR d.expertise = :expertise COLLATE NOCASE)
+                GROUP BY c.doctor_name, c.date
+                ORDER BY c.date, c.doctor_name
+            """, {"first": first, "until": until, "now": now.strftime("%H:%M"),
+                  "expertise": expertise}).fetchall()
+        return [dict(r) for r in rows]
+
+    def doctor_availability(self, expertise: Optional[str] = None, doctor_name: Optional[str] = None,
+                            days: int = 7) -> List[Dict[str, Any]]:
+        """
+        One row per doctor: name, expertise, timings, next free slot (date/time, None if booked
+        out for `days` days) and free slots left today. `expertise` matches partially ("cardio").
+        """
+        now = datetime.now()
+        first = now.strftime("%Y-%m-%d")
+        self.ensure_calendar(days=days, start=first)
+        until = (now + timedelta(days=days)).strftime("%Y-%m-%d")
+        doctor_name = re.sub(r"\(.*?\)", "", doctor_name).strip() if doctor_name else None
+        free = """
+            FROM calendar_slots c
+            WHERE c.doctor_name = d.doctor_name AND c.ref IS NULL
+              AND (c.date > :today OR c.time > :now)
+        """
+        with self._storage.read() as cur:
+            rows = cur.execute(f"""
+                SELECT d.doctor_name, d.expertise, d.timings,
+                       (SELECT c.date {free} AND c.date >= :today AND c.date < :until
+                        ORDER BY c.date, c.time LIMIT 1) AS next_date,
+                       (SELECT c.time {free} AND c.date >= :today AND c.date < :until
+                        ORDER BY c.date, c.time LIMIT 1) AS next_time,
+                       (SELECT COUNT(*) {free} AND c.date = :today) AS free_today
+                FROM doctors d
+                WHERE (:expertise IS NULL OR d.expertise LIKE '%' || :expertise || '%')
+                  AND (:doctor IS NULL OR d.doctor_name = :doctor COLLATE NOCASE)
+                ORDER BY d.expertise, d.doctor_name
+            """, {"today": first, "now": now.strftime("%H:%M"), "until": until,
+                  "expertise": expertise or None, "doctor": doctor_name}).fetchall()
+        return [dict(r) for r in rows]
 
     # ---------- Booking ----------
     def book_earliest(
@@ -115,117 +308,116 @@ class BookingManager:
         patient_name: str,
         patient_age: int,
         doctor_name: str,
-        date_str: str,
-            time: str,
-        # date_str: Optional[str] = None,
+        date_str: Optional[str] = None,
+        time: Optional[str] = None,
+        horizon_days: int = 7,
     ) -> Optional[Dict[str, Any]]:
         """
-        Books the earliest available slot for doctor on date_str (default: today).
+        Books the earliest free slot for doctor on date_str (default: today), rolling over to the
+        following days (up to horizon_days) when that day is full or already over.
+        `time` is the LLM's suggestion and is ignored: the slot is claimed in calendar_slots
+        inside one write transaction, so concurrent kiosks can't hand out the same slot.
         Returns booking dict with ref if successful; None otherwise.
-        Also decrements doctors.slots_remaining (floor=0).
         """
-        doctor = self._get_doctor(doctor_name)
-        # if not doctor:
-        #     print(doctor, "name is wrong")
-        #     return None
-
-        # # Check remaining capacity
-        # if int(doctor["slots_remaining"]) <= 0:
-        #     print("no slots")
-        #     return None
-
-        # available = self.list_available_slots(doctor_name, date_of_app)
-        # if not available:
-        #     return None
-        #
-        # earliest = available[0]
-
-        # Insert booking
-        ref = _short_ref()
+        now = datetime.now()
+        first = max(date_str or "", now.strftime("%Y-%m-%d"))
+        until = (datetime.strptime(first, "%Y-%m-%d") + timedelta(days=horizon_days)).strftime("%Y-%m-%d")
+        self.ensure_calendar(days=horizon_days, start=first)
+
         try:
-            cur = self._conn.cursor()
-            cur.execute("""
-                INSERT INTO bookings (patient_name, patient_age, doctor_name, expertise, date, time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (patient_name, int(patient_age), doctor_name, doctor["expertise"], date_str, time))
+            # BEGIN IMMEDIATE takes the write lock up front, so read-then-claim can't interleave
+            with self._storage.write() as cur:
+                doctor = self._get_doctor(doctor_name, cur)
+                if not doctor:
+                    print(doctor_name, "name is wrong")
+                    return None
+                slot = self._earliest_free_sql(cur, "c.doctor_name = :doctor",
+                                               {"first": first, "until": until,
+                                                "doctor": doctor["doctor_name"]})
+                if not slot:
+                    print("no slots")
+                    return None
 
-            # Decrement doctor's slots_remaining safely
-            cur.execute("""
-                UPDATE doctors
-                SET slots_remaining = CASE
-                    WHEN slots_remaining > 0 THEN slots_remaining - 1
-                    ELSE 0
-                END
-                WHERE doctor_name = ?
-            """, (doctor_name,))
-            self._conn.commit()
+                ref = _short_ref()
+                cur.execute("""
+                    UPDATE calendar_slots SET ref = ?
+                    WHERE doctor_name = ? AND date = ? AND time = ? AND ref IS NULL
+                """, (ref, doctor["doctor_name"], slot["date"], slot["time"]))
+                cur.execute("""
+                    INSERT INTO bookings (ref, patient_name, patient_age, doctor_name, expertise, date, time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (ref, patient_name, int(patient_age), doctor["doctor_name"], doctor["expertise"],
+                      slot["date"], slot["time"]))
             print("@@@@BOOKING DONE")
-        except Exception as e:
+        except sqlite3.Error as e:
             print("some error ", e)
-            # Unique slot conflict (rare race condition); retry logic could go here.
             return None
 
         return {
+            "ref": ref,
             "patient": patient_name,
             "age": int(patient_age),
-            "doctor": doctor_name,
+            "doctor": doctor["doctor_name"],
             "expertise": doctor["expertise"],
-            "date": date_str,
-            "time": time
+            "date": slot["date"],
+            "time": slot["time"]
         }
 
     # ---------- Cancel ----------
     def cancel_by_ref(self, ref: str) -> bool:
         """
-        Cancels a booking by reference and reclaims the slot (increments slots_remaining up to max_slots).
+        Cancels a booking by reference and frees its calendar slot, in one transaction.
+        A slot that is no longer on the doctor's current schedule (booked before a schedule
+        change) is deleted instead, so it can't be booked again.
         """
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT doctor_name, date, time FROM bookings WHERE ref = ?
-        """, (ref,)).fetchone()
-        if not row:
-            return False
-
-        doctor_name = row["doctor_name"]
-        # Delete booking
-        cur.execute("DELETE FROM bookings WHERE ref = ?", (ref,))
-        # Increment doctor's slots_remaining but not above max_slots
-        cur.execute("""
-            UPDATE doctors
-            SET slots_remaining = MIN(max_slots, slots_remaining + 1)
-            WHERE doctor_name = ?
-        """, (doctor_name,))
-        self._conn.commit()
+        with self._storage.write() as cur:
+            cur.execute("DELETE FROM bookings WHERE ref = ?", (ref,))
+            if cur.rowcount != 1:
+                return False
+            cur.execute("""
+                DELETE FROM calendar_slots
+                WHERE ref = :ref AND NOT EXISTS (
+                    SELECT 1 FROM doctor_schedules s, (
+                        SELECT CAST(substr(calendar_slots.time, 1, 2) AS INTEGER) * 60
+                             + CAST(substr(calendar_slots.time, 4, 2) AS INTEGER) AS minute
+                    ) t
+                    WHERE s.doctor_name = calendar_slots.doctor_name AND s.slot_count > 0
+                      AND t.minute >= s.start_min
+                      AND (t.minute = s.start_min OR (s.slot_minutes > 0
+                           AND (t.minute - s.start_min) % s.slot_minutes = 0
+                           AND (t.minute - s.start_min) / s.slot_minutes < s.slot_count))
+                )
+            """, {"ref": ref})
+            cur.execute("UPDATE calendar_slots SET ref = NULL WHERE ref = ?", (ref,))
         return True
 
     # ---------- Queries ----------
     def list_bookings_for_day(self, date_str: Optional[str] = None) -> List[Dict[str, Any]]:
         date_str = date_str or datetime.now().strftime("%Y-%m-%d")
-        cur = self._conn.cursor()
-        rows = cur.execute("""
-            SELECT patient_name, patient_age, doctor_name, expertise, date, time
-            FROM bookings
-            WHERE date = ?
-            ORDER BY doctor_name, time
-        """, (date_str,)).fetchall()
+        with self._storage.read() as cur:
+            rows = cur.execute("""
+                SELECT ref, patient_name, patient_age, doctor_name, expertise, date, time
+                FROM bookings
+                WHERE date = ?
+                ORDER BY doctor_name, time
+            """, (date_str,)).fetchall()
         return [dict(r) for r in rows]
 
     def get_everything(self):
-        cur = self._conn.cursor()
-        rows = cur.execute("""
-                    SELECT * FROM bookings
-                """)
+        with self._storage.read() as cur:
+            rows = cur.execute("""
+                        SELECT * FROM bookings
+                    """).fetchall()
         return [dict(r) for r in rows]
 
     def get_booking(self, ref: str) -> Optional[Dict[str, Any]]:
-        cur = self._conn.cursor()
-        row = cur.execute("""
-            SELECT patient_name, patient_age, doctor_name, expertise, date, time
-            FROM bookings WHERE ref = ?
-        """, (ref,)).fetchone()
+        with self._storage.read() as cur:
+            row = cur.execute("""
+                SELECT ref, patient_name, patient_age, doctor_name, expertise, date, time
+                FROM bookings WHERE ref = ?
+            """, (ref,)).fetchone()
         return dict(row) if row else None
 
     def close(self):
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        # the pool is shared with other DoctorDB/BookingManager instances; just let go of it
+        self._storage = None
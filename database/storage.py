@@ -0,0 +1,102 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+def default_db_path(db_name: str = "my_database.db", folder_name: str = "db") -> str:
+    # database file lives in a folder next to this package
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    db_folder = os.path.join(base_dir, folder_name)
+    os.makedirs(db_folder, exist_ok=True)
+    return os.path.join(db_folder, db_name)
+
+
+class Storage:
+    """
+    Shared access to one SQLite file.
+    - WAL journal + synchronous=NORMAL: readers never block the writer and vice versa
+    - one writer connection behind a lock; write() is a BEGIN IMMEDIATE transaction
+    - a small pool of reader connections; read() borrows one for the duration of the block
+    Connections are created with check_same_thread=False, so any thread may use them.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._writer = self._connect()
+        self._write_lock = threading.RLock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.Semaphore(readers)
+        self._all = [self._writer]
+        self._all_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: no implicit BEGINs, transactions are exactly what write() opens
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                with self._all_lock:
+                    self._all.append(conn)
+            try:
+                yield conn.cursor()
+            finally:
+                self._readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Cursor]:
+        """Atomic write block. Nested write() calls on the same thread join the outer transaction."""
+        with self._write_lock:
+            cur = self._writer.cursor()
+            if self._writer.in_transaction:
+                yield cur
+                return
+            # BEGIN/COMMIT on their own cursor so the caller's cur.rowcount survives the block
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+                self._writer.execute("COMMIT")
+            except BaseException:
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._all_lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+
+
+_storages: Dict[str, Storage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(db_path: str) -> Storage:
+    """One Storage per database file per process, shared by DoctorDB and BookingManager."""
+    key = os.path.abspath(db_path)
+    with _storages_lock:
+        if key not in _storages:
+            _storages[key] = Storage(key)
+        return _storages[key]
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from llama_index.core import Settings, SimpleDirectoryReader, StorageContext, VectorStoreIndex
+from llama_index.core import load_index_from_storage
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _hash_data_dir(data_dir: str) -> Dict[str, str]:
+    """
+    sha256 of every (non-hidden) file under data_dir -> {relative_path: digest}.
+    Mirrors what SimpleDirectoryReader picks up so the manifest tracks the same inputs.
+    """
+    hashes = {}
+    root = Path(data_dir)
+    for path in sorted(root.rglob("*")):
+        rel = path.relative_to(root)
+        if not path.is_file() or any(part.startswith(".") for part in rel.parts):
+            continue
+        hashes[rel.as_posix()] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return hashes
+
+
+def _embed_model_name() -> str:
+    # switching embedding models invalidates every stored vector
+    return getattr(Settings.embed_model, "model_name", type(Settings.embed_model).__name__)
+
+
+def _read_manifest(persist_dir: str) -> Optional[Dict]:
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(persist_dir: str, files: Dict[str, str]) -> None:
+    manifest = {"embed_model": _embed_model_name(), "files": files}
+    Path(persist_dir, MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def load_or_build_index(
+    data_dir: str = "data",
+    persist_dir: str = "storage/doctor_index",
+    transformations: Optional[List] = None,
+) -> VectorStoreIndex:
+    """
+    Load the doctor index from persist_dir, re-embedding only what changed in data_dir.
+    - manifest matches      -> load from disk, no embedding calls at all
+    - some files changed    -> refresh_ref_docs() re-embeds just those documents
+    - embed model changed / no store yet / store unreadable -> full build
+    """
+    files = _hash_data_dir(data_dir)
+    manifest = _read_manifest(persist_dir)
+    kwargs = {"transformations": transformations} if transformations else {}
+    # recursive, like _hash_data_dir: files in sub-folders are indexed, not just hashed
+    # filename_as_id keeps doc ids stable across runs so unchanged files hash-match
+    read_docs = lambda: SimpleDirectoryReader(data_dir, recursive=True, filename_as_id=True).load_data()
+
+    index = None
+    if manifest and manifest.get("embed_model") == _embed_model_name():
+        try:
+            storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+            index = load_index_from_storage(storage_context, **kwargs)
+        except Exception as e:
+            # truncated / half-written store behind a valid manifest: rebuild instead of failing boot
+            print(f"doctor index in {persist_dir} unreadable, rebuilding:", e)
+
+    if index is not None:
+        if manifest.get("files") == files:
+            return index
+        docs = read_docs()
+        index.refresh_ref_docs(docs)
+        live_ids = {d.id_ for d in docs}
+        for ref_id in list(index.ref_doc_info.keys()):
+            if ref_id not in live_ids:
+                index.delete_ref_doc(ref_id, delete_from_docstore=True)
+    else:
+        index = VectorStoreIndex.from_documents(read_docs(), **kwargs)
+
+    os.makedirs(persist_dir, exist_ok=True)
+    index.storage_context.persist(persist_dir=persist_dir)
+    _write_manifest(persist_dir, files)
+    return index
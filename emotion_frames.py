@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import pygame
+
+
+class EmotionFrames:
+    """
+    Emotion animations loaded on demand instead of all at startup.
+    - get(emotion) returns the frames if resident, otherwise starts a background load and returns
+      None (the caller shows idle meanwhile); get(..., wait=True) blocks on that same load
+    - the worker only decodes and scales; get() converts to the display format, so it must be called
+      from the thread that owns the display. load(emotion) is the thread-safe half (a Future)
+    - at most max_sets frame sets stay in RAM (LRU); `pinned` ones (idle) never count or leave
+    - cache_dir (off by default): scaled frames are also written to cache_dir/<w>x<h>/<emotion>.rgba
+      as raw RGBA, keyed by the source files' names/sizes/mtimes, so later boots skip PNG decoding
+      and smoothscale. ~1.5 MB per 800x480 frame: only worth it where reading beats decoding
+    """
+
+    def __init__(
+        self,
+        root: str,
+        size: Tuple[int, int],
+        max_sets: int = 2,
+        cache_dir: Optional[str] = None,
+        pinned: Tuple[str, ...] = ("idle",),
+    ):
+        self.root = root
+        self.size = (int(size[0]), int(size[1]))
+        self.max_sets = max_sets
+        self.cache_dir = os.path.join(cache_dir, f"{self.size[0]}x{self.size[1]}") if cache_dir else None
+        self.pinned = set(pinned)
+        self.names: Set[str] = {e for e in os.listdir(root) if os.path.isdir(os.path.join(root, e))}
+        self._sets: "OrderedDict[str, List[pygame.Surface]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}   # emotion -> decode in flight (or failed: result [])
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotions")
+
+    # ---------- Public ----------
+    def get(self, emotion: str, wait: bool = False) -> Optional[List[pygame.Surface]]:
+        frames = self._sets.get(emotion)
+        if frames is not None:
+            self._sets.move_to_end(emotion)
+            return frames
+        if emotion not in self.names:
+            return None
+        future = self.load(emotion)
+        if not (wait or future.done()):
+            return None
+        decoded = future.result()
+        if not decoded:
+            return []   # failed; the future stays so it is not retried every frame
+        with self._lock:
+            self._pending.pop(emotion, None)
+        frames = [frame.convert_alpha() for frame in decoded]
+        self._sets[emotion] = frames
+        self._evict()
+        return frames
+
+    def load(self, emotion: str) -> Future:
+        """Decode and scale in the background; every caller shares one load per emotion."""
+        with self._lock:
+            future = self._pending.get(emotion)
+            if future is None:
+                future = self._pending[emotion] = self._pool.submit(self._load, emotion)
+            return future
+
+    # ---------- Loading ----------
+    def _sources(self, emotion: str) -> List[str]:
+        folder = os.path.join(self.root, emotion)
+        return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.lower().endswith(".png")]
+
+    def _signature(self, sources: List[str]) -> str:
+        h = hashlib.sha1(repr(self.size).encode())
+        for path in sources:
+            st = os.stat(path)
+            h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def _decode(self, path: str) -> pygame.Surface:
+        image = pygame.image.load(path)
+        if image.get_bitsize() < 24:   # palette PNGs: smoothscale needs 24/32 bit
+            rgba = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+            rgba.blit(image, (0, 0))
+            image = rgba
+        return pygame.transform.smoothscale(image, self.size)
+
+    def _load(self, emotion: str) -> List[pygame.Surface]:
+        # worker thread: no display calls here
+        try:
+            sources = self._sources(emotion)
+            signature = self._signature(sources)
+            frames = self._read_cache(emotion, signature)
+            if frames is None:
+                frames = [self._decode(p) for p in sources]
+                self._write_cache(emotion, signature, frames)
+            return frames
+        except Exception as e:
+            print(f"could not load emotion {emotion}: {e}")
+            return []
+
+    def _evict(self) -> None:
+        unpinned = [e for e in self._sets if e not in self.pinned]
+        while len(unpinned) > self.max_sets:
+            del self._sets[unpinned.pop(0)]
+
+    # ---------- Disk tier ----------
+    def _paths(self, emotion: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, emotion)
+        return base + ".json", base + ".rgba"
+
+    def _read_cache(self, emotion: str, signature: str) -> Optional[List[pygame.Surface]]:
+        if not self.cache_dir:
+            return None
+        meta_path, data_path = self._paths(emotion)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("signature") != signature:
+                return None
+            with open(data_path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        frame_bytes = self.size[0] * self.size[1] * 4
+        if len(data) != frame_bytes * meta["frames"]:
+            return None
+        return [pygame.image.frombuffer(data[i * frame_bytes:(i + 1) * frame_bytes], self.size, "RGBA")
+                for i in range(meta["frames"])]
+
+    def _write_cache(self, emotion: str, signature: str, frames: List[pygame.Surface]) -> None:
+        if not self.cache_dir or not frames:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, data_path = self._paths(emotion)
+        try:
+            # data first, meta last: a crash in between leaves a signature mismatch, not garbage
+            with open(data_path + ".tmp", "wb") as f:
+                for frame in frames:
+                    f.write(pygame.image.tobytes(frame, "RGBA"))
+            os.replace(data_path + ".tmp", data_path)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "frames": len(frames), "size": self.size}, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError as e:
+            print(f"could not cache emotion {emotion}: {e}")
@@ -0,0 +1,314 @@
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Dict, List, Optional, Tuple
+
+from booking_message import format_booking_message, format_no_slot_message, format_slot
+from database.patient_database import BookingManager
+
+# ---------- Patterns (compiled once) ----------
+# Vosk hands us lowercase text without punctuation and with numbers spelled out
+_UNITS = {w: i for i, w in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen "
+    "sixteen seventeen eighteen nineteen".split())}
+_TENS = {w: 10 * i for i, w in enumerate("_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()) if i > 1}
+_NUM_WORD = "(?:" + "|".join(sorted([*_UNITS, *_TENS, "hundred"], key=len, reverse=True)) + ")"
+_NUM = rf"(?:\d+|{_NUM_WORD}(?:[\s-]+{_NUM_WORD})*)"
+
+# a name only after an explicit cue; "i am ..." / "this is ..." are usually not names
+_NAME = re.compile(r"\b(?:my name is|my name's|name is|call me)\s+([a-z][a-z' -]{0,40})", re.I)
+_NAME_REPLY = re.compile(r"^(?:it's|its|it is|name is)?\s*([a-z][a-z' -]{0,40})$", re.I)
+_AGE = re.compile(rf"\b({_NUM})\s*(?:years?|yrs?)(?:\s+old)?\b", re.I)
+_AGE_PREFIX = re.compile(rf"\b(?:aged?|age is)\s+({_NUM})\b", re.I)
+_BARE_AGE = re.compile(rf"\b({_NUM})\b", re.I)   # only while we wait for an age
+_YES = re.compile(r"^\s*(?:yes|yeah|yep|yup|sure|ok|okay|correct|right|please do|go ahead|confirm)\b", re.I)
+_NO = re.compile(r"^\s*(?:no|nope|nah|not|wrong|don't|do not)\b", re.I)
+
+# words a slot-filling turn may carry besides the values; anything else left over -> LLM
+_FILLER = {"please", "uh", "um", "okay", "ok", "yes", "yeah", "well", "so", "and", "the", "is", "am", "i", "i'm",
+           "im", "my", "he", "she", "he's", "she's", "it's", "its", "age", "aged", "old", "hi", "hello",
+           "thanks", "thank", "you", "patient", "patient's", "with", "to", "see", "book", "want", "i'd",
+           "would", "like", "a", "an", "appointment", "for", "me"}
+
+# a name ends at the first of these (or after two words): "john and i am thirty four"
+_NAME_STOP = {"and", "i", "i'm", "im", "is", "am", "was", "are", "he", "she", "his", "her", "my", "age", "aged",
+              "years", "year", "old", "have", "has", "had", "want", "need", "would", "like", "please", "from",
+              "with", "to", "for", "but", "so", "the", "a", "an", "not", "feeling"}
+
+# single words that are never a name on their own
+_NOT_NAMES = {"feeling", "sick", "not", "having", "looking", "here", "fine", "good", "okay", "ok", "in",
+              "suffering", "getting", "worried", "calling", "trying", "going", "a", "an", "the", "so",
+              "very", "really", "sorry", "done", "back", "yes", "no", "yeah", "nope", "hello", "hi", "doctor"}
+
+_DURATION = {"for", "since", "past", "last", "few", "over"}
+
+# plain words for the specialties in data/doctors_list.json; symptoms are left to the LLM
+SPECIALTY_WORDS: Dict[str, str] = {
+    "cardiologist": "Cardiologist", "cardiology": "Cardiologist", "heart specialist": "Cardiologist",
+    "heart doctor": "Cardiologist",
+    "dermatologist": "Dermatologist", "skin specialist": "Dermatologist", "skin doctor": "Dermatologist",
+    "pediatrician": "Pediatrician", "paediatrician": "Pediatrician", "child specialist": "Pediatrician",
+    "children's doctor": "Pediatrician",
+    "orthopedic": "Orthopedic Surgeon", "orthopaedic": "Orthopedic Surgeon", "bone doctor": "Orthopedic Surgeon",
+    "ent": "ENT Specialist", "ear nose throat": "ENT Specialist", "ear nose and throat": "ENT Specialist",
+}
+_SPECIALTY = re.compile(r"\b(" + "|".join(sorted(map(re.escape, SPECIALTY_WORDS), key=len, reverse=True)) + r")\b",
+                        re.I)
+
+
+def parse_number(text: str) -> Optional[int]:
+    """'34', 'thirty four', 'thirty-four', 'a hundred and two' -> int; None if not a number."""
+    text = text.strip().lower().replace("-", " ")
+    if text.isdigit():
+        return int(text)
+    total, seen = 0, False
+    for word in text.split():
+        if word in ("and", "a"):
+            continue
+        if word in _UNITS:
+            total += _UNITS[word]
+        elif word in _TENS:
+            total += _TENS[word]
+        elif word == "hundred":
+            total = max(total, 1) * 100
+        else:
+            return None
+        seen = True
+    return total if seen else None
+
+
+# ---------- Session state ----------
+@dataclass
+class SessionState:
+    """What is known about the caller's booking so far; one per conversation."""
+    name: Optional[str] = None
+    age: Optional[int] = None
+    doctor: Optional[str] = None
+    specialty: Optional[str] = None
+    awaiting: Optional[str] = None   # "name" | "age" | "doctor" | "confirm": what we just asked for
+    last_ref: Optional[str] = None
+
+    def missing(self) -> Optional[str]:
+        for slot in ("doctor", "name", "age"):
+            if getattr(self, slot) is None:
+                return slot
+        return None
+
+    def booked(self, booking: Dict) -> None:
+        # the same caller may book again for someone else; keep nothing but the ref
+        self.last_ref = booking["ref"]
+        self.name = self.age = self.doctor = self.specialty = self.awaiting = None
+
+
+Span = Tuple[int, int]
+
+
+@dataclass
+class Route:
+    reply: str
+    booking: Optional[Dict] = None
+
+
+# ---------- Router ----------
+class IntentRouter:
+    """
+    Rule-based pre-router in front of the LLM.
+    - a turn made only of slot values (name after "my name is"/"call me", age, doctor, specialty)
+      or a yes/no gets a templated reply (and the booking itself) and updates the SessionState
+    - anything else (symptoms, questions, small talk, a value inside a longer sentence) returns
+      None and goes to the LLM with the SessionState untouched
+    """
+
+    def __init__(self, booking_manager: BookingManager):
+        self.booking_manager = booking_manager
+        self._doctors: Optional[List[Dict]] = None
+
+    # ---- parsing ----
+    def _doctor_rows(self) -> List[Dict]:
+        if self._doctors is None:
+            self._doctors = self.booking_manager.doctor_availability()
+        return self._doctors
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(re.sub(r"\bdr\.?(?=\s)", "doctor", text.lower()).replace(",", " ").replace(".", " ")
+                        .replace("?", " ").replace("!", " ").split())
+
+    @staticmethod
+    def _doctor_pattern(doctor_name: str, loose: bool) -> str:
+        parts = re.sub(r"^dr\.?\s*", "", doctor_name.lower()).split()
+        forms = [r"(?:doctor\s+)?" + r"\s+".join(map(re.escape, parts))]
+        forms += [r"doctor\s+" + re.escape(p) for p in parts]
+        # bare first/last name only when we just asked which doctor
+        if loose:
+            forms += [re.escape(p) for p in parts]
+        return r"\b(?:" + "|".join(forms) + r")\b"
+
+    def _match_doctor(self, low: str, loose: bool) -> Tuple[Optional[str], List[Span]]:
+        for row in self._doctor_rows():
+            m = re.search(self._doctor_pattern(row["doctor_name"], loose), low)
+            if m:
+                return row["doctor_name"], [m.span()]
+        return None, []
+
+    @staticmethod
+    def _clean_name(candidate: str) -> Optional[str]:
+        words = []
+        for w in candidate.split():
+            if w in _NAME_STOP or parse_number(w) is not None or len(words) == 2:
+                break
+            words.append(w)
+        if not words or words[0] in _NOT_NAMES:
+            return None
+        return " ".join(w.capitalize() for w in words)
+
+    def _match_name(self, low: str, state: SessionState) -> Tuple[Optional[str], List[Span]]:
+        m = _NAME.search(low)
+        if m:
+            name = self._clean_name(m.group(1))
+            if name:
+                # consume the cue and the name words, not what follows them
+                return name, [(m.start(), m.start(1) + len(name))]
+            return None, []
+        if state.awaiting == "name":
+            m = _NAME_REPLY.match(low)
+            # only a bare answer ("john", "it's john smith") counts
+            if m and len(m.group(1).split()) <= 2:
+                name = self._clean_name(m.group(1))
+                if name and len(name.split()) == len(m.group(1).split()):
+                    return name, [(0, len(low))]
+        return None, []
+
+    def _match_age(self, low: str, state: SessionState) -> Tuple[Optional[int], List[Span]]:
+        for pattern in (_AGE, _AGE_PREFIX) + ((_BARE_AGE,) if state.awaiting == "age" else ()):
+            m = pattern.search(low)
+            if not m:
+                continue
+            before = low[:m.start()].split()
+            # "coughing for two years" is a duration, not an age
+            if pattern is _AGE and before and before[-1] in _DURATION:
+                return None, []
+            n = parse_number(m.group(1))
+            if n is not None and 0 < n < 120:
+                return n, [m.span()]
+            return None, []
+        return None, []
+
+    # ---- routing ----
+    @staticmethod
+    def _consumed(low: str, spans: List[Span]) -> bool:
+        """True if nothing but filler is left once the matched slot values are cut out."""
+        chars = list(low)
+        for start, end in spans:
+            chars[start:end] = " " * (end - start)
+        return all(w in _FILLER for w in "".join(chars).split())
+
+    def route(self, text: str, state: SessionState) -> Optional[Route]:
+        """
+        Templated reply when the utterance is only slot values / yes / no, else None.
+        State is only changed when the turn is routed; on None the LLM sees it untouched.
+        """
+        low = self._normalize(text)
+        if not low:
+            return None
+
+        if state.awaiting == "confirm":
+            m = _YES.match(low)
+            if m and self._consumed(low, [m.span()]):
+                return self._book(state)
+            m = _NO.match(low)
+            if m and self._consumed(low, [m.span()]):
+                state.awaiting = None
+                return Route("No problem. What should I change: the doctor, the name or the age?")
+            if m:
+                # "no, the age is thirty": parse the correction below
+                low = low[m.end():].strip()
+
+        draft = replace(state)
+        spans: List[Span] = []
+        doctor, found = self._match_doctor(low, loose=state.awaiting == "doctor")
+        if doctor:
+            draft.doctor = doctor
+            spans += found
+        m = _SPECIALTY.search(low)
+        picked_specialty = bool(m and not doctor)
+        if picked_specialty:
+            draft.specialty = SPECIALTY_WORDS[m.group(1)]
+            spans.append(m.span())
+        elif m:
+            spans.append(m.span())   # "doctor khan the cardiologist"
+        age, found = self._match_age(low, state)
+        if age is not None:
+            draft.age = age
+            spans += found
+        name, found = self._match_name(low, state)
+        if name:
+            draft.name = name
+            spans += found
+
+        # nothing recognised, or more said than slot values (symptoms, questions, dates): the LLM decides
+        if not spans or not self._consumed(low, spans):
+            return None
+        # a name/age while no doctor is settled: the LLM is mid-recommendation, asking "which doctor?" derails it
+        if draft.doctor is None and draft.specialty is None:
+            return None
+        for f in fields(state):
+            setattr(state, f.name, getattr(draft, f.name))
+        return self._next_question(state, picked_doctor=bool(doctor), picked_specialty=picked_specialty)
+
+    def observe_reply(self, reply: str, state: SessionState) -> None:
+        """
+        Take the doctor from an LLM answer that names exactly one ("Dr. Aisha Khan can see you ...
+        may I have your name?"), so the name/age turns that follow can be routed.
+        """
+        if state.doctor is not None:
+            return
+        low = self._normalize(reply)
+        named = [row["doctor_name"] for row in self._doctor_rows()
+                 if re.search(self._doctor_pattern(row["doctor_name"], loose=False), low)]
+        if len(named) == 1:
+            state.doctor = named[0]
+
+    def _next_question(self, state: SessionState, picked_doctor: bool, picked_specialty: bool) -> Route:
+        lead = ""
+        if picked_doctor:
+            rows = self.booking_manager.doctor_availability(doctor_name=state.doctor)
+            if rows and not rows[0]["next_date"]:
+                doctor = state.doctor
+                state.doctor = None
+                state.awaiting = "doctor"
+                return Route(format_no_slot_message(doctor))
+            if rows:
+                r = rows[0]
+                lead = (f"{r['doctor_name']} ({r['expertise']}) sees patients {r['timings']}, "
+                        f"earliest free slot {format_slot(r['next_date'], r['next_time'])}. ")
+        elif picked_specialty and state.doctor is None:
+            rows = [r for r in self.booking_manager.doctor_availability(expertise=state.specialty) if r["next_date"]]
+            if not rows:
+                state.awaiting = "doctor"
+                return Route(f"Sorry, no {state.specialty} has free slots in the coming days. "
+                             "Is there anything else that I can help you with?")
+            r = rows[0]
+            if len(rows) == 1:
+                state.doctor = r["doctor_name"]
+            lead = "; ".join(f"{x['doctor_name']} sees patients {x['timings']}" for x in rows) + ". "
+
+        missing = state.missing()
+        state.awaiting = missing or "confirm"
+        if missing == "doctor":
+            return Route(lead + "Which doctor would you like to see?")
+        if missing == "name":
+            return Route(lead + "May I have the patient's name, please?")
+        if missing == "age":
+            return Route(lead + f"Thanks {state.name}. How old is the patient?")
+        return Route(lead + f"Shall I book the earliest slot with {state.doctor} "
+                            f"for {state.name}, age {state.age}?")
+
+    def _book(self, state: SessionState) -> Route:
+        booking = self.booking_manager.book_earliest(
+            patient_name=state.name, patient_age=state.age, doctor_name=state.doctor)
+        if not booking:
+            doctor = state.doctor
+            state.doctor, state.awaiting = None, "doctor"
+            return Route(format_no_slot_message(doctor))
+        state.booked(booking)
+        return Route(format_booking_message(booking), booking=booking)
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.llms import ChatMessage
+from llama_index.core.storage.chat_store.base import BaseChatStore
+
+
+class JsonlChatStore(BaseChatStore):
+    """
+    Append-only chat store: every change is one JSON line, so a turn costs a couple of small
+    appends instead of rewriting the whole history file.
+    - ops: add (optionally at idx), set, del, del_idx, pop; replayed in order on load
+    - compact() rewrites the log as one "set" line per key (tmp file + os.replace); it runs by
+      itself once the log holds compact_ratio times more lines than live messages
+    """
+
+    path: str = Field(default="chat_store.jsonl", description="Log file.")
+    compact_ratio: float = Field(default=2.0, description="Log lines per live message before compacting.")
+    fsync: bool = Field(default=False, description="fsync after every append (power-loss safe, slower).")
+
+    _store: Dict[str, List[ChatMessage]] = PrivateAttr(default_factory=dict)
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    _file = PrivateAttr(default=None)
+    _lines: int = PrivateAttr(default=0)
+    _live: int = PrivateAttr(default=0)   # messages across all keys, kept up to date by every op
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "JsonlChatStore"
+
+    # ---------- Log ----------
+    @staticmethod
+    def _dump(message: ChatMessage) -> Dict:
+        return message.model_dump(mode="json")
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        end = 0   # byte offset just past the last complete line
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break   # a torn last line after a crash; everything before it is intact
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._lines += 1
+                self._apply(record)
+        if end < os.path.getsize(self.path):
+            # cut the fragment off, or the next append would be glued onto it and lost on replay
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+    def _apply(self, record: Dict) -> None:
+        op, key = record["op"], record["key"]
+        if op == "add":
+            msgs = self._store.setdefault(key, [])
+            message = ChatMessage.model_validate(record["msg"])
+            if record.get("idx") is None:
+                msgs.append(message)
+            else:
+                msgs.insert(record["idx"], message)
+            self._live += 1
+        elif op == "set":
+            self._live -= len(self._store.get(key, []))
+            self._store[key] = [ChatMessage.model_validate(m) for m in record["msgs"]]
+            self._live += len(self._store[key])
+        elif op == "del":
+            self._live -= len(self._store.pop(key, []))
+        elif op == "del_idx":
+            msgs = self._store.get(key, [])
+            if 0 <= record["idx"] < len(msgs):
+                msgs.pop(record["idx"])
+                self._live -= 1
+        elif op == "pop":
+            msgs = self._store.get(key, [])
+            if msgs:
+                msgs.pop()
+                self._live -= 1
+
+    def _append(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._lines += 1
+        if self._lines > 64 and self._lines > self.compact_ratio * max(self._live, 1):
+            self.compact()
+
+    def compact(self) -> None:
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for key, msgs in self._store.items():
+                    f.write(json.dumps({"op": "set", "key": key, "msgs": [self._dump(m) for m in msgs]},
+                                       ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._lines = len(self._store)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    # ---------- BaseChatStore ----------
+    def set_messages(self, key: str, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            self._live += len(messages) - len(self._store.get(key, []))
+            self._store[key] = list(messages)
+            self._append({"op": "set", "key": key, "msgs": [self._dump(m) for m in messages]})
+
+    def get_messages(self, key: str) -> List[ChatMessage]:
+        with self._lock:
+            return list(self._store.get(key, []))
+
+    def add_message(self, key: str, message: ChatMessage, idx: Optional[int] = None) -> None:
+        with self._lock:
+            msgs = self._store.setdefault(key, [])
+            if idx is None:
+                msgs.append(message)
+            else:
+                msgs.insert(idx, message)
+            self._live += 1
+            self._append({"op": "add", "key": key, "msg": self._dump(message), "idx": idx})
+
+    def delete_messages(self, key: str) -> Optional[List[ChatMessage]]:
+        with self._lock:
+            if key not in self._store:
+                return None
+            msgs = self._store.pop(key)
+            self._live -= len(msgs)
+            self._append({"op": "del", "key": key})
+            return msgs
+
+    def delete_message(self, key: str, idx: int) -> Optional[ChatMessage]:
+        with self._lock:
+            msgs = self._store.get(key, [])
+            if not 0 <= idx < len(msgs):
+                return None
+            message = msgs.pop(idx)
+            self._live -= 1
+            self._append({"op": "del_idx", "key": key, "idx": idx})
+            return message
+
+    def delete_last_message(self, key: str) -> Optional[ChatMessage]:
+        with self._lock:
+            msgs = self._store.get(key, [])
+            if not msgs:
+                return None
+            message = msgs.pop()
+            self._live -= 1
+            self._append({"op": "pop", "key": key})
+            return message
+
+    def get_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._store.keys())
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Union
+
+from ollama import AsyncClient
+
+
+class GatewayBusy(RuntimeError):
+    """Raised instead of queueing when too many requests are already waiting for the model."""
+
+
+def _pct(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class LLMGateway:
+    """
+    Admission control in front of the local Ollama server, shared by every session.
+    - the chat engines still talk to Ollama through llama-index; each LLM turn holds a slot()
+    - at most max_concurrency turns run at once (match OLLAMA_NUM_PARALLEL); the rest wait
+    - more than max_waiting waiters -> GatewayBusy right away instead of an ever longer queue
+    - its own AsyncClient only loads the model (warm) and keeps it loaded between sessions
+    - queue depth, wait and run times are kept for metrics()
+    """
+
+    def __init__(
+        self,
+        model: str = "gemma3:4b",
+        host: str = "http://localhost:11434",
+        max_concurrency: int = 1,
+        max_waiting: int = 8,
+        keep_alive: Union[str, float] = "30m",
+        request_timeout: float = 45.0,
+    ):
+        self.model = model
+        self.keep_alive = keep_alive
+        self.max_waiting = max_waiting
+        self.client = AsyncClient(host=host, timeout=request_timeout)
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+        self._waits = deque(maxlen=256)
+        self._runs = deque(maxlen=256)
+        self._last_used = time.monotonic()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one model slot; anything talking to Ollama (also through llama-index) goes in here."""
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise GatewayBusy(f"{self.waiting} requests already waiting for {self.model}")
+        self.waiting += 1
+        queued = time.monotonic()
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.monotonic()
+        self._waits.append(started - queued)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+            self.served += 1
+            self._last_used = time.monotonic()
+            self._runs.append(self._last_used - started)
+
+    async def warm(self) -> None:
+        """Load the model (an empty generate only loads it) and reset its keep_alive timer."""
+        await self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        self._last_used = time.monotonic()
+
+    async def keep_warm(self, every: float = 240.0) -> None:
+        # only pings when idle; real requests refresh keep_alive themselves
+        while True:
+            await asyncio.sleep(every)
+            if self.in_flight == 0 and time.monotonic() - self._last_used >= every:
+                try:
+                    await self.warm()
+                except Exception as e:
+                    print("keep-alive ping failed:", e)
+
+    def metrics(self) -> Dict:
+        return {
+            "model": self.model,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "rejected": self.rejected,
+            "wait_p50_s": _pct(self._waits, 0.5),
+            "wait_p95_s": _pct(self._waits, 0.95),
+            "run_p50_s": _pct(self._runs, 0.5),
+            "run_p95_s": _pct(self._runs, 0.95),
+        }
@@ -0,0 +1,56 @@
+# prefill benchmark: old prompt layout vs static-prefix layout, against a running Ollama
+# python prefill_benchmark.py [model]
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from ollama import chat
+
+from prompts import SYSTEM_PROMPT, dynamic_context, static_system_prompt
+
+MODEL = sys.argv[1] if len(sys.argv) > 1 else "gemma3:4b"
+doctors = json.loads(Path("data/doctors_list.json").read_text(encoding="utf-8"))
+availability = "\n".join(f"{d['doctor_name']} | {d['expertise']} | free today: {d['slots_remaining']}" for d in doctors)
+
+# canned conversation; the model only has to prefill it, one predicted token per turn
+turns = [
+    ("hello", "Hello! How can I help you?"),
+    ("my son has a fever and a cough", "Dr. Fatima Siddiqui, our pediatrician, can see him. May I have his name and age?"),
+    ("his name is riya", "Thanks. How old is Riya?"),
+    ("she is two", "Shall I book the earliest slot with Dr. Fatima Siddiqui for Riya, age 2?"),
+    ("yes please", "Okay, I've booked the first available slot."),
+    ("what time should we come", "Please come ten minutes before 11:00 AM."),
+]
+
+
+def old_layout(history, user):
+    # what the RAG chat engine sent: timestamped system prompt with this turn's retrieved context
+    system = f"{SYSTEM_PROMPT}\nToday is {datetime.now()}.\nContext:\n{availability}"
+    return [{"role": "system", "content": system}, *history, {"role": "user", "content": user}]
+
+
+def new_layout(history, user):
+    return [
+        {"role": "system", "content": static_system_prompt(doctors)},
+        *history,
+        {"role": "system", "content": dynamic_context(extra="Doctors (live availability):\n" + availability)},
+        {"role": "user", "content": user},
+    ]
+
+
+def run(name, layout):
+    history, total_ms = [], 0.0
+    print(f"\n{name}")
+    for i, (user, answer) in enumerate(turns):
+        response = chat(model=MODEL, messages=layout(history, user), options={"num_predict": 1, "num_ctx": 2048})
+        ms = (response.prompt_eval_duration or 0) / 1e6
+        total_ms += ms
+        print(f"  turn {i + 1}: prefilled {response.prompt_eval_count or 0:5d} tokens in {ms:8.1f} ms")
+        history += [{"role": "user", "content": user}, {"role": "assistant", "content": answer}]
+    print(f"  total prefill {total_ms:.0f} ms")
+
+
+chat(model=MODEL, messages=[{"role": "user", "content": "hi"}], options={"num_predict": 1})  # load the model
+run("old layout (timestamp + retrieved context in the system prompt)", old_layout)
+run("new layout (static prefix, dynamic suffix)", new_layout)
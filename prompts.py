@@ -1,8 +1,12 @@
 # primary system prompt
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
-SYSTEM_PROMPT = f"""
-You are a medical booking assistant. Today is {datetime.now()}.
+# static like TOOLS_SYSTEM_PROMPT: callers put dynamic_context() in front of each message, so the
+# date stays right in a process that runs past midnight
+SYSTEM_PROMPT = """
+You are a medical booking assistant. The current date and time are given right before the
+patient's latest message.
 
 Rules:
 1. If the patient describes an issue, recommend a doctor with:
@@ -19,6 +23,49 @@ Rules:
 6. After confirmation, don’t repeat BOOKING_CONFIRMATION unless details change.
 """
 
+# tool-calling variant: availability comes from find_doctors/check_doctor, not retrieved chunks.
+# Static on purpose: Ollama reuses the KV cache for an identical prompt prefix, so anything that
+# changes (date, availability, summary) goes in the suffix built by dynamic_context().
+TOOLS_SYSTEM_PROMPT = """
+You are a medical booking assistant. The current date and time are given right before the
+patient's latest message.
+
+Rules:
+1. If the patient describes an issue, pick a doctor from the roster and recommend them with
+   Name, Expertise, Visiting hours. Call find_doctors or check_doctor for availability;
+   never guess it.
+2. If the doctor is fully booked, say "No available slots for Dr. <Doctor>".
+3. To book, ask for both Name and Age. Don’t confirm without both.
+4. Just to be sure, ask for the spelling of the patients name.
+5. Once both Name and Age are provided, use the doctor's earliest free slot and confirm:
+   BOOKING_CONFIRMATION:
+   - Patient: <Name>, Age <Age>
+   - Doctor: <Doctor Name>
+   - Date: <YYYY-MM-DD>
+   - Time: <hh:mm AM/PM>
+6. After confirmation, don’t repeat BOOKING_CONFIRMATION unless details change.
+7. Keep answers short, they are read out loud.
+"""
+
+
+def build_roster(doctors) -> str:
+    """Doctor roster for the static prefix: who, what and when; never availability (that changes)."""
+    lines = [f"- {d['doctor_name']}, {d['expertise']}, {d['timings']}" for d in doctors]
+    return "Doctors:\n" + "\n".join(lines)
+
+
+def static_system_prompt(doctors) -> str:
+    return TOOLS_SYSTEM_PROMPT.strip() + "\n\n" + build_roster(doctors)
+
+
+def dynamic_context(now: Optional[datetime] = None, extra: str = "") -> str:
+    """Per-turn suffix: minute resolution is enough for slots and keeps the text short."""
+    now = now or datetime.now()
+    tomorrow = now + timedelta(days=1)
+    text = f"Now: {now:%A %Y-%m-%d %H:%M}. Tomorrow is {tomorrow:%A %Y-%m-%d}."
+    return text + ("\n" + extra if extra else "")
+
+
 # SYSTEM_PROMPT = f"""
 # You are a friendly and efficient booking assistant for a medical clinic.
 # Today's date/time is {datetime.now()}.
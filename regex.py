@@ -21,39 +21,134 @@
 #         "time": time
 #     })
 
+import json
 import re
-from datetime import datetime
-
-
-def get_booking_data(text):
-    # Flexible regex pattern
-    pattern = r"""
-    BOOKING_CONFIRMATION:              # match the literal text
-    \s*[-–—]?\s*                       # optional dash and spaces
-    Patient:\s*(.*?)[,\-]\s*Age\s*(\d+) # capture patient name, then age
-    \s*[-–—]?\s*Doctor:\s*(.*?)         # capture doctor name
-    \s*[-–—]?\s*Date:\s*([\d]{4}-\d{2}-\d{2}) # capture date
-    \s*[-–—]?\s*Time:\s*([\d]{1,2}:\d{2})     # capture time
+from typing import Any, Dict, Optional
+
+MARKER = "BOOKING_CONFIRMATION"
+
+# compiled once; tolerant of dashes/bullets/newlines between fields and of 12h or 24h times
+_BOOKING = re.compile(r"""
+    BOOKING_CONFIRMATION[*\s]*:?                                        # match the literal text
+    [\s\-–—•*]*Patient[*\s]*:[*\s]*(?P<patient>.*?)                      # patient name
+    [,\-–][*\s]*Age[*\s:]*(?P<age>\d{1,3})                              # then age
+    [\s\-–—•*]*Doctor[*\s]*:[*\s]*(?P<doctor>.*?)                        # doctor name
+    [\s\-–—•*]*Date[*\s]*:[*\s]*(?P<date>\d{4}-\d{2}-\d{2})             # date
+    [\s\-–—•*]*Time[*\s]*:[*\s]*(?P<hour>\d{1,2}):(?P<minute>\d{2})      # time
+    (?:\s*(?P<ampm>[AaPp])\.?\s*[Mm]\.?)?                               # optional AM/PM
+    """, re.VERBOSE | re.IGNORECASE | re.DOTALL)
+
+
+def _to_24h(hour: str, minute: str, ampm: Optional[str]) -> Optional[str]:
+    h, m = int(hour), int(minute)
+    if ampm:
+        if not 1 <= h <= 12:
+            return None
+        h = h % 12 + (12 if ampm.lower() == "p" else 0)
+    if h > 23 or m > 59:
+        return None
+    return f"{h:02d}:{m:02d}"
+
+
+def _from_match(match: "re.Match") -> Optional[Dict[str, Any]]:
+    time = _to_24h(match["hour"], match["minute"], match["ampm"])
+    if time is None:
+        return None
+    return {
+        "patient": match["patient"].strip(" *"),
+        "age": int(match["age"]),
+        "doctor": match["doctor"].strip(" *"),
+        "date": match["date"],
+        "time": time,   # HH:MM, 24h
+    }
+
+
+def get_booking_data(text: str) -> Optional[Dict[str, Any]]:
+    """
+    BOOKING_CONFIRMATION block -> {patient, age, doctor, date, time}; None if there is no
+    complete block. Times come back as 24h HH:MM whether the LLM wrote '2:30 PM' or '14:30'.
     """
+    match = _BOOKING.search(text)
+    return _from_match(match) if match else None
 
-    match = re.search(pattern, text, re.VERBOSE | re.IGNORECASE)
 
-    if match:
-        patient_name = match.group(1).strip()
-        age = match.group(2).strip()
-        doctor_name = match.group(3).strip()
-        date = match.group(4).strip()
-        time = match.group(5).strip()
+class BookingExtractor:
+    """
+    Incremental extractor fed with the streamed LLM tokens.
+    - `detected` turns on as soon as BOOKING_CONFIRMATION appears; the marker is looked for only
+      in the new text (plus an overlap), the block is only matched from the marker on
+    - feed() returns the booking once the block is complete, i.e. something follows the time
+      (otherwise a trailing ' PM' may still be on its way); close() settles the end of stream
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._start = -1
+        self.data: Optional[Dict[str, Any]] = None
+
+    @property
+    def detected(self) -> bool:
+        return self._start >= 0
+
+    def feed(self, token: str) -> Optional[Dict[str, Any]]:
+        if self.data is not None:
+            return self.data
+        scan_from = max(0, len(self._buf) - len(MARKER) + 1)
+        self._buf += token
+        if self._start < 0:
+            self._start = self._buf.find(MARKER, scan_from)
+            if self._start < 0:
+                return None
+        match = _BOOKING.match(self._buf, self._start)
+        # only final once the text continues past the time (and any AM/PM)
+        if match and self._buf[match.end():].strip() and not re.match(r"\s*[AaPp]?\.?\s*$", self._buf[match.end():]):
+            self.data = _from_match(match)
+        return self.data
 
-        # formatted_time = str(datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d"))
+    def close(self) -> Optional[Dict[str, Any]]:
+        if self.data is None and self.detected:
+            match = _BOOKING.match(self._buf, self._start)
+            self.data = _from_match(match) if match else None
+        return self.data
 
-        booking_data = {
-            "patient": patient_name,
-            "age": age,
-            "doctor": doctor_name,
-            "date": date,
-            "time": time
-        }
 
-        print(booking_data)
-        return booking_data
\ No newline at end of file
+# ---------- Structured-output fallback ----------
+_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "patient": {"type": "string"},
+        "age": {"type": "integer"},
+        "doctor": {"type": "string"},
+        "date": {"type": "string", "description": "YYYY-MM-DD"},
+        "time": {"type": "string", "description": "HH:MM, 24h"},
+    },
+    "required": ["patient", "age", "doctor", "date", "time"],
+}
+
+
+def get_booking_data_json(text: str, model: str = "gemma3:4b", host: str = "http://localhost:11434") -> Optional[Dict[str, Any]]:
+    """
+    Ask Ollama for the booking as JSON (schema-constrained output) when the LLM garbled the
+    BOOKING_CONFIRMATION block. Only used after the regex failed; None on any problem.
+    """
+    try:
+        from ollama import Client
+    except ImportError:
+        return None
+    try:
+        response = Client(host=host).chat(
+            model=model,
+            messages=[{"role": "user", "content": "Extract the booking from this text:\n" + text}],
+            format=_SCHEMA,
+            options={"temperature": 0},
+        )
+        data = json.loads(response.message.content)
+        time = re.match(r"\s*(\d{1,2}):(\d{2})\s*([AaPp])?", str(data["time"]))
+        data["time"] = _to_24h(*time.groups()) if time else None
+        data["age"] = int(data["age"])
+    except Exception as e:
+        print("structured booking extraction failed:", e)
+        return None
+    if not data["time"] or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", str(data["date"])):
+        return None
+    return {k: data[k] for k in ("patient", "age", "doctor", "date", "time")}
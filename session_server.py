@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from availability_engine import AvailabilityChatEngine, build_availability_tools, describe_availability
+from booking_message import format_booking_message, format_no_slot_message
+from database.doctor_database import DoctorDB
+from database.patient_database import BookingManager
+from intent_router import IntentRouter, SessionState
+from llm_gateway import GatewayBusy, LLMGateway
+from prompts import static_system_prompt
+from summary_memory import SummaryMemory
+from regex import BookingExtractor, get_booking_data_json
+from llama_index.core import Settings
+from llama_index.core.storage.chat_store import SimpleChatStore
+from llama_index.llms.ollama import Ollama
+
+
+# ---------- Sessions ----------
+@dataclass
+class Session:
+    id: str
+    engine: AvailabilityChatEngine
+    memory: SummaryMemory
+    state: SessionState
+    last_seen: float = field(default_factory=time.monotonic)
+    # one turn at a time per session; different sessions run concurrently
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionManager:
+    """
+    Sessions keyed by id (kiosk name, phone call id, web chat cookie).
+    - each session owns its SummaryMemory, stored under its id in one shared chat store
+    - the LLM, database, tools and router are shared by all sessions
+    - sessions idle for idle_timeout seconds are evicted together with their history
+    """
+
+    def __init__(self, make_engine: Callable[[SummaryMemory], AvailabilityChatEngine],
+                 chat_store: Optional[SimpleChatStore] = None,
+                 idle_timeout: float = 600.0, memory_tokens: int = 900, summary_llm=None):
+        self.make_engine = make_engine
+        self.chat_store = chat_store or SimpleChatStore()
+        self.idle_timeout = idle_timeout
+        self.memory_tokens = memory_tokens
+        # None: structured summary only; an LLM here bypasses the gateway's limits
+        self.summary_llm = summary_llm
+        self.sessions: Dict[str, Session] = {}
+
+    def get(self, session_id: Optional[str] = None) -> Session:
+        session_id = session_id or uuid.uuid4().hex[:12]
+        session = self.sessions.get(session_id)
+        if session is None:
+            state = SessionState()
+            memory = SummaryMemory(chat_store=self.chat_store, chat_store_key=session_id,
+                                   token_limit=self.memory_tokens, llm=self.summary_llm, state=state)
+            session = Session(id=session_id, engine=self.make_engine(memory), memory=memory, state=state)
+            self.sessions[session_id] = session
+        session.last_seen = time.monotonic()
+        return session
+
+    def end(self, session_id: str) -> None:
+        if self.sessions.pop(session_id, None) is not None:
+            self.chat_store.delete_messages(session_id)
+
+    def evict_idle(self) -> int:
+        now = time.monotonic()
+        idle = [sid for sid, s in self.sessions.items()
+                if now - s.last_seen > self.idle_timeout and not s.lock.locked()]
+        for sid in idle:
+            self.end(sid)
+        return len(idle)
+
+    async def evict_forever(self, every: float = 30.0) -> None:
+        while True:
+            await asyncio.sleep(every)
+            evicted = self.evict_idle()
+            if evicted:
+                print(f"evicted {evicted} idle sessions, {len(self.sessions)} active")
+
+
+# ---------- Turns ----------
+async def _iterate_in_thread(gen) -> AsyncIterator[str]:
+    """
+    Drive a blocking token generator on a worker thread and hand tokens to the event loop.
+    Closing this iterator (client gone) stops the worker and waits for it, so whatever holds the
+    gateway slot around it keeps holding it until Ollama is no longer streaming.
+    """
+    loop = asyncio.get_running_loop()
+    q: "asyncio.Queue" = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for item in gen:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(q.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(q.put_nowait, e)
+        finally:
+            close = getattr(gen, "close", None)
+            if close:
+                close()   # ends the HTTP stream to Ollama
+        loop.call_soon_threadsafe(q.put_nowait, done)
+
+    worker = threading.Thread(target=pump, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = await q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        await asyncio.to_thread(worker.join)
+
+
+class ConversationService:
+    """The kiosk's turn logic (fast path, LLM, booking) for many sessions at once, without audio/UI."""
+
+    def __init__(self, sessions: SessionManager, router: IntentRouter, booking_manager: BookingManager,
+                 gateway: LLMGateway):
+        self.sessions = sessions
+        self.router = router
+        self.booking_manager = booking_manager
+        self.gateway = gateway
+        # whether the model takes tools; learned by the first LLM turn, then shared by every session
+        self.tools_supported: Optional[bool] = None
+
+    async def turn(self, session_id: Optional[str], text: str) -> AsyncIterator[Dict]:
+        """Yields {"type": "token", ...} events while the LLM streams, then one {"type": "final", ...}."""
+        session = self.sessions.get(session_id)
+        async with session.lock:
+            routed = await asyncio.to_thread(self.router.route, text, session.state)
+            if routed:
+                session.memory.add_turn(text, routed.reply)
+                yield {"type": "final", "session": session.id, "text": routed.reply, "booking": routed.booking}
+                return
+
+            extractor = BookingExtractor()
+            answer = []
+            engine = session.engine
+            if self.tools_supported is not None:
+                engine.tools_supported = self.tools_supported
+            try:
+                # the whole LLM part of the turn (tool rounds included) holds one gateway slot
+                async with self.gateway.slot():
+                    # closed inside the slot: a client that hangs up mid-answer frees it only once
+                    # the worker thread has stopped pulling tokens
+                    async with aclosing(_iterate_in_thread(engine.stream_chat(text).response_gen)) as tokens:
+                        async for token in tokens:
+                            answer.append(token)
+                            extractor.feed(token)
+                            yield {"type": "token", "session": session.id, "text": token}
+                self.tools_supported = engine.tools_supported
+            except GatewayBusy:
+                yield {"type": "final", "session": session.id, "booking": None, "busy": True,
+                       "text": "Sorry, I'm helping a lot of people right now. Please try again in a moment."}
+                return
+            except Exception as e:
+                yield {"type": "final", "session": session.id, "text": f"(error) {e}", "booking": None,
+                       "error": True}
+                return
+
+            res_text = "".join(answer).strip().replace("*", "")
+            self.router.observe_reply(res_text, session.state)   # the doctor it recommended, for the fast path
+            booking = None
+            if extractor.detected:
+                try:
+                    data = extractor.close() or await asyncio.to_thread(get_booking_data_json, res_text)
+                    if data is None:
+                        raise ValueError("could not read the booking details")
+                    # the slot is allocated by the database, the LLM's Time: is only a hint
+                    booking = await asyncio.to_thread(
+                        self.booking_manager.book_earliest,
+                        data["patient"], int(data["age"]), data["doctor"], data["date"], data["time"])
+                except Exception as e:
+                    # same as the kiosk: tell the caller, keep the connection
+                    yield {"type": "final", "session": session.id, "text": f"Booking error: {e}",
+                           "booking": None, "error": True}
+                    return
+                if booking:
+                    session.state.booked(booking)
+                    res_text = format_booking_message(booking)
+                else:
+                    res_text = format_no_slot_message(data["doctor"])
+            session.last_seen = time.monotonic()
+            yield {"type": "final", "session": session.id, "text": res_text, "booking": booking}
+
+
+# ---------- Transport ----------
+async def _handle_client(service: ConversationService, reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter) -> None:
+    """
+    JSON lines over TCP. Request: {"session": "kiosk-1", "text": "..."}, {"session": ..., "end": true}
+    or {"metrics": true}.
+    Response: one JSON event per line, the last one has "type": "final".
+    """
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+            except ValueError:
+                writer.write(b'{"type": "final", "error": true, "text": "bad request"}\n')
+                continue
+            if request.get("metrics"):
+                stats = {**service.gateway.metrics(), "sessions": len(service.sessions.sessions)}
+                writer.write(json.dumps({"type": "final", "metrics": stats}).encode() + b"\n")
+            elif request.get("end"):
+                service.sessions.end(request.get("session", ""))
+                writer.write(b'{"type": "final", "text": ""}\n')
+            else:
+                async with aclosing(service.turn(request.get("session"), request.get("text", ""))) as events:
+                    async for event in events:
+                        writer.write(json.dumps(event).encode() + b"\n")
+                        await writer.drain()
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(gateway: LLMGateway, host: str = "0.0.0.0", port: int = 8765, idle_timeout: float = 600.0) -> None:
+    db = DoctorDB(); db.load_from_json_file('data/doctors_list.json')
+    booking_manager = BookingManager()
+    tools = build_availability_tools(db, booking_manager)
+
+    def make_engine(memory: SummaryMemory) -> AvailabilityChatEngine:
+        return AvailabilityChatEngine(
+            llm=Settings.llm,
+            tools=tools,
+            memory=memory,
+            system_prompt=static_system_prompt(db.get_all()),
+            fallback_context=lambda: describe_availability(booking_manager.doctor_availability()),
+        )
+
+    sessions = SessionManager(make_engine, idle_timeout=idle_timeout)
+    service = ConversationService(sessions, IntentRouter(booking_manager), booking_manager, gateway)
+    try:
+        await gateway.warm()   # load the model before the first caller waits for it
+    except Exception as e:
+        print("could not preload", gateway.model, e)
+    background = [asyncio.create_task(sessions.evict_forever()), asyncio.create_task(gateway.keep_warm())]
+    server = await asyncio.start_server(lambda r, w: _handle_client(service, r, w), host, port)
+    print(f"session server on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in background:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-session booking assistant server (JSON lines over TCP)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=600.0)
+    parser.add_argument("--parallel", type=int, default=1, help="concurrent LLM requests (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-waiting", type=int, default=8, help="queued LLM requests before answering busy")
+    args = parser.parse_args()
+
+    gateway = LLMGateway(model="gemma3:4b", max_concurrency=args.parallel, max_waiting=args.max_waiting)
+    Settings.llm = Ollama(
+        model=gateway.model,
+        base_url="http://localhost:11434/",
+        request_timeout=45.0,
+        keep_alive=gateway.keep_alive,   # don't let Ollama unload the model between sessions
+        additional_kwargs={
+            "num_ctx": 2048,
+            "num_predict": 256,
+            "temperature": 0.2,
+        },
+    )
+    asyncio.run(serve(gateway, args.host, args.port, args.idle_timeout))
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Startup:
+    """
+    Loads independent components concurrently and records how long each one took.
+    - submit(name, fn) runs fn on the pool; wait(name) blocks until it is ready (re-raises errors)
+    - track(name, future) times a load that runs on its own thread instead
+    - timed(name) records work that has to stay on the calling thread (pygame on the main thread)
+    - report() prints one line per component, offsets from process start; save_report() appends
+      the same numbers as a JSON line so boot-time regressions show up across runs
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.t0 = time.perf_counter()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self._futures: Dict[str, Future] = {}
+        self._times: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name: str, start: float, ok: bool) -> None:
+        end = time.perf_counter()
+        with self._lock:
+            self._times[name] = {
+                "start_ms": round((start - self.t0) * 1000),
+                "ms": round((end - start) * 1000),
+                "thread": threading.current_thread().name,
+                "ok": ok,
+            }
+
+    def submit(self, name: str, fn: Callable[[], Any]) -> Future:
+        def run():
+            start, ok = time.perf_counter(), False
+            try:
+                result = fn()
+                ok = True
+                return result
+            finally:
+                self._record(name, start, ok)
+
+        self._futures[name] = self._pool.submit(run)
+        return self._futures[name]
+
+    def track(self, name: str, future: Future) -> Future:
+        """Time work that already runs elsewhere (its own pool) without taking a startup worker."""
+        start = time.perf_counter()
+        future.add_done_callback(lambda f: self._record(name, start, f.exception() is None))
+        self._futures[name] = future
+        return future
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> Any:
+        return self._futures[name].result(timeout=timeout)
+
+    @contextmanager
+    def timed(self, name: str):
+        start, ok = time.perf_counter(), False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(name, start, ok)
+
+    def mark(self, name: str) -> None:
+        """A milestone (e.g. 'greeting spoken'): zero duration at the current offset."""
+        self._record(name, time.perf_counter(), True)
+
+    def report(self) -> List[str]:
+        with self._lock:
+            rows = sorted(self._times.items(), key=lambda kv: kv[1]["start_ms"] + kv[1]["ms"])
+        lines = [f"{'component':<18}{'start':>8}{'took':>8}{'ready at':>10}  thread"]
+        for name, t in rows:
+            status = "" if t["ok"] else "  FAILED"
+            lines.append(f"{name:<18}{t['start_ms']:>6}ms{t['ms']:>6}ms{t['start_ms'] + t['ms']:>8}ms  "
+                         f"{t['thread']}{status}")
+        print("\n".join(["---- startup ----", *lines]))
+        return lines
+
+    def save_report(self, path: str = "storage/startup_times.jsonl") -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            record = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "components": dict(self._times)}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
@@ -1,15 +1,16 @@
 # vosk_auto.py
-import json
-import time
-import audioop
+from typing import Callable, Optional
 import pyaudio
-from vosk import Model, KaldiRecognizer
+from vosk import Model
+from tts_stt.vosk_stream import Utterance, VoskStream
+
 
 class VoskSpeech:
     """
     - Auto-picks a usable input device (no manual device name).
     - Uses the device's native sample rate; resamples to 16kHz for Vosk if needed.
-    - Blocks until speech + trailing silence (like your mac version).
+    - The mic stays open between turns (VoskStream); get_text_from_speech() blocks until the
+      next utterance (speech + trailing silence) is recognized.
     """
 
     def __init__(self, path_to_model: str, prefer_rate: int = 16000):
@@ -17,7 +18,8 @@ class VoskSpeech:
         self.pa = pyaudio.PyAudio()
         self.rec_rate = prefer_rate  # Vosk model rate (16k typical)
         self.device_index, self.device_rate = self._auto_pick_device()
-        self.recognizer = KaldiRecognizer(self.model, self.rec_rate)
+        # resampling to rec_rate (audioop.ratecv, NumPy polyphase on 3.13+) happens inside the stream
+        self.stream = VoskStream(self.model, self.pa, self.device_index, self.device_rate, rec_rate=self.rec_rate)
 
     # ----- device selection -----
     def _auto_pick_device(self):
@@ -57,70 +59,48 @@ class VoskSpeech:
         best = max(candidates, key=score)
         return int(best["index"]), int(best.get("defaultSampleRate", 16000))
 
-    # ----- main capture with resampling & silence tail -----
+    # ----- listening -----
+    @property
+    def last_utterance(self) -> Optional[Utterance]:
+        """Timing of the last result (None after a timeout), for turn tracing."""
+        return self.stream.last_utterance
+
+    @property
+    def on_speech_start(self) -> Optional[Callable[[], None]]:
+        return self.stream.on_speech_start
+
+    @on_speech_start.setter
+    def on_speech_start(self, callback: Optional[Callable[[], None]]):
+        self.stream.on_speech_start = callback
+
+    def start_listen(self):
+        self.stream.start()
+        self.stream.resume()
+
+    def stop_listen(self):
+        """Mute recognition (e.g. while TTS plays); the capture keeps running."""
+        self.stream.pause()
+        self.stream.start()  # opens the device once, up front
+
     def get_text_from_speech(self, silence_timeout: float = 1.0, max_duration: float = 10.0) -> str:
         """
-        Listen until speech occurs, then stop after 'silence_timeout' seconds of trailing silence.
-        Also stops after 'max_duration' seconds total.
+        Wait for the next utterance: speech followed by up to 'silence_timeout' seconds of
+        silence (the energy endpointer ends turns sooner in a quiet room),
+        capped at 'max_duration' seconds of speech. Returns "" if nothing was said within
+        'max_duration' seconds.
         """
-        # ~20ms frames are stable across devices
-        frames_per_buffer = max(256, int(self.device_rate * 0.02))
-
-        stream = self.pa.open(
-            rate=self.device_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            input_device_index=self.device_index,
-            frames_per_buffer=frames_per_buffer,
-        )
-        stream.start_stream()
-        print(f"Listening on device #{self.device_index} at {self.device_rate} Hz...")
-
-        start_time = time.time()
-        last_speech_time = None
-        full_text = ""
-        rs_state = None  # audioop.ratecv state
+        self.stream.silence_timeout = silence_timeout
+        self.stream.max_duration = max_duration
+        self.start_listen()
+        utterance = self.stream.next_utterance(timeout=max_duration + silence_timeout)
+        return utterance.text if utterance else ""
 
-        try:
-            while True:
-                data = stream.read(frames_per_buffer, exception_on_overflow=False)
-
-                # resample to recognizer rate if needed
-                if self.device_rate != self.rec_rate:
-                    data, rs_state = audioop.ratecv(
-                        data, 2, 1, self.device_rate, self.rec_rate, rs_state
-                    )
-
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    if result.get("text"):
-                        full_text += " " + result["text"]
-                        last_speech_time = time.time()
-                else:
-                    partial = json.loads(self.recognizer.PartialResult())
-                    if partial.get("partial"):
-                        last_speech_time = time.time()
-
-                # only consider silence if we've heard speech
-                if last_speech_time and (time.time() - last_speech_time > silence_timeout):
-                    print("Silence detected, stopping...")
-                    break
-
-                if time.time() - start_time > max_duration:
-                    print("Max duration reached, stopping...")
-                    break
-        finally:
-            stream.stop_stream()
-            stream.close()
-
-        return full_text.strip()
-
-
-# No manual device name needed
-stt = VoskSpeech("tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4")
-
-# print("Recognized:", stt.get_text_from_speech(
-#     silence_timeout=1.0,   # increase to ~1.2–1.5 if it cuts off too fast
-#     max_duration=12.0
-# ))
+
+if __name__ == "__main__":
+    # No manual device name needed
+    stt = VoskSpeech("tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4")
+
+    print("Recognized:", stt.get_text_from_speech(
+        silence_timeout=1.0,   # increase to ~1.2–1.5 if it cuts off too fast
+        max_duration=12.0
+    ))
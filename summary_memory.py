@@ -0,0 +1,135 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from intent_router import SessionState
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.storage.chat_store import SimpleChatStore
+from llama_index.core.storage.chat_store.base import BaseChatStore
+
+# one background summarizer for all sessions: it competes with live turns for the same model
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
+NOTES_PROMPT = """Update the notes about this clinic booking conversation.
+Keep only what matters for booking: the patient's problem, preferences, open questions.
+At most 40 words, plain text.
+
+Current notes: {notes}
+
+Older turns to fold in:
+{transcript}
+
+Updated notes:"""
+
+
+def _tokens(text: str) -> int:
+    # close enough for budgeting; a real tokenizer call would cost more than it saves
+    return len(text) // 4 + 1
+
+
+class SummaryMemory:
+    """
+    Bounded chat memory: a structured summary message plus the last keep_turns exchanges.
+    - name / age / doctor / specialty / booking status come straight from the SessionState the
+      intent router keeps, so they cost nothing and never drift
+    - turns that leave the window are folded into short free-text notes by the LLM on a
+      background thread after the answer is out, never while the user waits
+    - the full history stays in the chat store; only the prompt is bounded (token_limit)
+    Drop-in for ChatMemoryBuffer where only get()/put()/reset() are used.
+    """
+
+    def __init__(
+        self,
+        chat_store: Optional[BaseChatStore] = None,
+        chat_store_key: str = "user1",
+        keep_turns: int = 3,
+        token_limit: int = 900,
+        llm=None,
+        state: Optional[SessionState] = None,
+    ):
+        self.chat_store = chat_store or SimpleChatStore()
+        self.chat_store_key = chat_store_key
+        self.keep_turns = keep_turns
+        self.token_limit = token_limit
+        self.llm = llm
+        self.state = state
+        self.notes = ""
+        self._folded = 0                  # messages [0, _folded) are already in the notes
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    # ---------- Window ----------
+    def _window_start(self, msgs: List[ChatMessage]) -> int:
+        users = [i for i, m in enumerate(msgs) if m.role == MessageRole.USER]
+        start = users[-self.keep_turns] if len(users) >= self.keep_turns else 0
+        budget = self.token_limit - _tokens(self.summary())
+        # drop whole turns from the front until the window fits
+        while start < len(msgs) - 1 and sum(_tokens(m.content or "") for m in msgs[start:]) > budget:
+            later = [i for i in users if i > start]
+            start = later[0] if later else len(msgs) - 1
+        return start
+
+    def summary(self) -> str:
+        parts = []
+        st = self.state
+        if st is not None:
+            known = [f"{label} {value}" for label, value in
+                     (("patient", st.name), ("age", st.age), ("doctor", st.doctor), ("specialty", st.specialty))
+                     if value]
+            if known:
+                parts.append(", ".join(known))
+            parts.append(f"last booking ref {st.last_ref}" if st.last_ref else "nothing booked yet")
+        if self.notes:
+            parts.append("notes: " + self.notes)
+        return "Conversation so far: " + "; ".join(parts) + "." if parts else ""
+
+    # ---------- Memory interface ----------
+    def get(self, input: Optional[str] = None, **kwargs) -> List[ChatMessage]:
+        msgs = self.chat_store.get_messages(self.chat_store_key)
+        window = msgs[self._window_start(msgs):]
+        summary = self.summary()
+        # summary last: it changes every turn, the turns before it stay a cacheable prefix
+        return [*window, ChatMessage(role=MessageRole.SYSTEM, content=summary)] if summary else window
+
+    def get_all(self) -> List[ChatMessage]:
+        return self.chat_store.get_messages(self.chat_store_key)
+
+    def put(self, message: ChatMessage) -> None:
+        self.chat_store.add_message(self.chat_store_key, message)
+        if message.role == MessageRole.ASSISTANT:
+            self._schedule_fold()
+
+    def add_turn(self, user: str, assistant: str) -> None:
+        """Record a turn answered outside the LLM (fast path) so later prompts still see it."""
+        self.put(ChatMessage(role=MessageRole.USER, content=user))
+        self.put(ChatMessage(role=MessageRole.ASSISTANT, content=assistant))
+
+    def reset(self) -> None:
+        self.chat_store.delete_messages(self.chat_store_key)
+        with self._lock:
+            self.notes, self._folded = "", 0
+
+    # ---------- Background notes ----------
+    def _schedule_fold(self) -> None:
+        if self.llm is None:
+            return
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return  # the next put() picks up whatever this one misses
+            msgs = self.chat_store.get_messages(self.chat_store_key)
+            start = self._window_start(msgs)
+            if start <= self._folded:
+                return
+            self._pending = _pool.submit(self._fold, msgs[self._folded:start], start)
+
+    def _fold(self, evicted: List[ChatMessage], upto: int) -> None:
+        transcript = "\n".join(f"{m.role.value}: {m.content}" for m in evicted)
+        prompt = NOTES_PROMPT.format(notes=self.notes or "(none)", transcript=transcript)
+        try:
+            notes = self.llm.complete(prompt).text.strip()
+        except Exception as e:
+            print("summary update failed:", e)
+            return
+        with self._lock:
+            self.notes = " ".join(notes.split())[:300]
+            self._folded = upto
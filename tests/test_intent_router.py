@@ -0,0 +1,141 @@
+from datetime import date
+
+import pytest
+
+from intent_router import IntentRouter, SessionState
+
+TODAY = date.today().isoformat()
+
+
+class FakeBookings:
+    """Just the two BookingManager calls the router makes."""
+
+    rows = [
+        {"doctor_name": "Dr. Aisha Khan", "expertise": "Cardiologist", "timings": "9:00 AM - 12:00 PM",
+         "next_date": TODAY, "next_time": "10:00", "free_today": 3},
+        {"doctor_name": "Dr. Rohit Mehra", "expertise": "Dermatologist", "timings": "10:00 AM - 1:00 PM",
+         "next_date": TODAY, "next_time": "11:00", "free_today": 2},
+    ]
+
+    def __init__(self):
+        self.booked = []
+
+    def doctor_availability(self, expertise=None, doctor_name=None, days=7):
+        return [r for r in self.rows
+                if (expertise is None or r["expertise"] == expertise)
+                and (doctor_name is None or r["doctor_name"] == doctor_name)]
+
+    def book_earliest(self, patient_name, patient_age, doctor_name, date_str=None, time=None):
+        booking = {"ref": "R1", "doctor": doctor_name, "date": TODAY, "time": "10:00",
+                   "patient": patient_name, "age": patient_age}
+        self.booked.append(booking)
+        return booking
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(FakeBookings())
+
+
+@pytest.mark.parametrize("text", [
+    "i am dizzy",
+    "i'm tired",
+    "i am diabetic",
+    "i'm pregnant",
+    "this is my first visit",
+    "my son is five years old and has a rash",
+    "is doctor khan available tomorrow",
+    "i have had a cough for two years",
+])
+def test_free_form_turns_go_to_the_llm_untouched(router, text):
+    state = SessionState()
+    assert router.route(text, state) is None
+    assert state == SessionState()
+
+
+def test_free_form_turn_keeps_pending_question(router):
+    state = SessionState(doctor="Dr. Aisha Khan", awaiting="name")
+    assert router.route("i'm pregnant", state) is None
+    assert state == SessionState(doctor="Dr. Aisha Khan", awaiting="name")
+
+
+def test_name_stops_at_conjunction(router):
+    state = SessionState(doctor="Dr. Aisha Khan")
+    route = router.route("my name is john and i am thirty four years old", state)
+    assert route is not None
+    assert (state.name, state.age) == ("John", 34)
+    assert state.awaiting == "confirm"
+
+
+@pytest.mark.parametrize("text, name", [
+    ("call me john", "John"),
+    ("my name is john smith", "John Smith"),
+    ("my name is priya please", "Priya"),
+])
+def test_explicit_name_cues(router, text, name):
+    state = SessionState(doctor="Dr. Aisha Khan")
+    assert router.route(text, state) is not None
+    assert state.name == name
+
+
+def test_name_before_a_doctor_is_settled_goes_to_the_llm(router):
+    state = SessionState()
+    assert router.route("i need a cardiologist", state) is None
+    assert router.route("my name is john smith", state) is None
+    assert state == SessionState()
+
+
+def test_doctor_recommended_by_the_llm_is_remembered(router):
+    state = SessionState()
+    assert router.route("i need a cardiologist", state) is None
+    router.observe_reply("Dr. Aisha Khan is our cardiologist. May I have the patient's name and age?", state)
+    assert state.doctor == "Dr. Aisha Khan"
+    route = router.route("my name is john smith", state)
+    assert state.name == "John Smith"
+    assert route.reply.endswith("How old is the patient?")
+
+
+def test_reply_naming_several_doctors_settles_nothing(router):
+    state = SessionState()
+    router.observe_reply("Dr. Aisha Khan and Dr. Rohit Mehra both have slots today.", state)
+    assert state.doctor is None
+
+
+def test_bare_name_only_when_asked(router):
+    state = SessionState(doctor="Dr. Aisha Khan", awaiting="name")
+    assert router.route("ravi kumar", state) is not None
+    assert state.name == "Ravi Kumar"
+    assert router.route("ravi kumar", SessionState()) is None
+
+
+def test_age_forms(router):
+    state = SessionState(doctor="Dr. Aisha Khan", name="Ravi", awaiting="age")
+    assert router.route("he is thirty four", state) is not None
+    assert state.age == 34
+    assert router.route("i am thirty four", SessionState()) is None
+
+
+def test_doctor_and_specialty(router):
+    state = SessionState()
+    route = router.route("i want to see doctor khan", state)
+    assert state.doctor == "Dr. Aisha Khan"
+    assert route.reply.endswith("May I have the patient's name, please?")
+    state = SessionState()
+    router.route("a dermatologist please", state)
+    assert (state.specialty, state.doctor) == ("Dermatologist", "Dr. Rohit Mehra")
+
+
+def test_confirm_books_only_on_plain_yes(router):
+    state = SessionState(doctor="Dr. Aisha Khan", name="Ravi", age=34, awaiting="confirm")
+    assert router.route("yes but can it be tomorrow evening", state) is None
+    assert not router.booking_manager.booked
+    route = router.route("yes please", state)
+    assert route.booking["ref"] == "R1"
+    assert state.last_ref == "R1" and state.name is None
+
+
+def test_no_with_correction(router):
+    state = SessionState(doctor="Dr. Aisha Khan", name="Ravi", age=34, awaiting="confirm")
+    route = router.route("no he is forty years old", state)
+    assert state.age == 40
+    assert route.reply.startswith("Shall I book")
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from tts_stt.resampler import PolyphaseResampler
+
+
+def _signal(rate: int, seconds: float = 0.5) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 3000, int(rate * seconds)).astype(np.int16)
+
+
+@pytest.mark.parametrize("rate", [44100, 48000, 22050])
+@pytest.mark.parametrize("block", [1, 7, 160, 441, 882, 1024, 4096])
+def test_streamed_equals_one_shot(rate, block):
+    audio = _signal(rate)
+    whole = PolyphaseResampler(rate, 16000).process(audio.tobytes())
+    rs = PolyphaseResampler(rate, 16000)
+    streamed = b"".join(rs.process(audio[i:i + block].tobytes()) for i in range(0, audio.size, block))
+    assert streamed == whole
+
+
+def test_process_frames_matches_process():
+    rate = 44100
+    audio = _signal(rate)
+    frames = [audio[i:i + 1024].tobytes() for i in range(0, audio.size, 1024)]
+    whole = PolyphaseResampler(rate, 16000).process(audio.tobytes())
+    rs = PolyphaseResampler(rate, 16000)
+    out = []
+    for i in range(0, len(frames), 3):
+        out += rs.process_frames(frames[i:i + 3])
+    assert b"".join(out) == whole
+
+
+def test_output_length_follows_rate():
+    audio = _signal(48000, seconds=1.0)
+    out = PolyphaseResampler(48000, 16000).process(audio.tobytes())
+    assert len(out) // 2 == 16000
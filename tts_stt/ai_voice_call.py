@@ -3,30 +3,75 @@
 import simpleaudio as sa
 
 
+import os
 import threading
-import wave
+import time
+from typing import Callable, Iterable, Optional
 from piper import PiperVoice
+from tts_stt.audio_scheduler import AudioScheduler, ANSWER, FILLER
+from tts_stt.phrase_cache import PhraseCache, Pcm
+from tts_stt.speech_stream import split_sentences
 from pydub import AudioSegment
 from pydub.playback import play
 
 class Piper:
-    def __init__(self, path_to_model):
+    def __init__(self, path_to_model, cache_size=256, cache_dir="tts_stt/phrase_cache"):
         self.voice = PiperVoice.load(path_to_model)
+        # sentence-level cache: greetings, fillers and booking-message tails are synthesized once
+        self.cache = PhraseCache(max_items=cache_size, disk_dir=cache_dir,
+                                 namespace=os.path.basename(path_to_model))
+        self.scheduler = AudioScheduler(self)  # every utterance goes through this one queue
+        # (text, start, end) in perf_counter time after each synthesize(); used for turn tracing
+        self.on_synthesized: Optional[Callable[[str, float, float], None]] = None
 
-    def get_and_speak(self, text):
-        with wave.open("test.wav", "wb") as wav_file:
-            self.voice.synthesize_wav(text, wav_file)
+    def _synthesize_pcm(self, text) -> Pcm:
+        """
+        Synthesize straight into memory: Piper's int16 PCM chunks are joined, no WAV file
+        round-trip. Each call owns its buffer, so concurrent callers can't clobber each other.
+        """
+        chunks = []
+        rate, width, channels = self.voice.config.sample_rate, 2, 1
+        for chunk in self.voice.synthesize(text):
+            chunks.append(chunk.audio_int16_bytes)
+            rate, width, channels = chunk.sample_rate, chunk.sample_width, chunk.sample_channels
+        return Pcm(b"".join(chunks), channels, width, rate)
 
-        # sound = AudioSegment.from_wav('test.wav')
-        # play(sound)
-        wave_obj = sa.WaveObject.from_wave_file('test.wav')
-        play_obj = wave_obj.play()
-        play_obj.wait_done()  # wait until playback finishes
-        # play_obj.stop()
+    def _sentence_pcm(self, sentence, persist=False) -> Pcm:
+        pcm = self.cache.get(sentence)
+        if pcm is None:
+            pcm = self._synthesize_pcm(sentence)
+            # only known phrases (prewarm) are written to disk; LLM sentences stay in memory
+            self.cache.put(sentence, pcm, persist=persist)
+        return pcm
 
-    def get_and_speak_non_blocking(self, text):
-    # This method runs the speech synthesis and playback in a separate thread.
-        threading.Thread(target=self.get_and_speak, args=(text,)).start()
+    def synthesize(self, text) -> sa.WaveObject:
+        # per sentence so templated text ("... at 10:30 today. Please be on time.") still hits the cache
+        start = time.perf_counter()
+        parts = [self._sentence_pcm(s) for s in split_sentences(text)] or [self._synthesize_pcm(text)]
+        first = parts[0]
+        data = first.data if len(parts) == 1 else b"".join(p.data for p in parts)
+        if self.on_synthesized:
+            self.on_synthesized(text, start, time.perf_counter())
+        return sa.WaveObject(data, first.channels, first.sample_width, first.sample_rate)
+
+    def prewarm(self, phrases: Iterable[str]) -> threading.Thread:
+        """Fill the cache for known phrases in the background."""
+        def _warm():
+            for phrase in phrases:
+                for sentence in split_sentences(phrase):
+                    if sentence not in self.cache:
+                        self._sentence_pcm(sentence, persist=True)
+        t = threading.Thread(target=_warm, daemon=True)
+        t.start()
+        return t
+
+    def get_and_speak(self, text, priority=ANSWER):
+        # blocks until spoken; queued behind (or dropping) whatever is already scheduled
+        self.scheduler.say(text, priority=priority, block=True)
+
+    def get_and_speak_non_blocking(self, text, priority=FILLER):
+        # no thread per call: the scheduler synthesizes and plays it when its turn comes
+        return self.scheduler.say(text, priority=priority)
 
 # pipe = Piper('../en_US-lessac-medium.onnx')
 #
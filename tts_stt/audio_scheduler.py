@@ -0,0 +1,131 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import simpleaudio as sa
+
+# priorities: higher wins. Submitting a job drops every *queued* job of lower priority,
+# so a ready answer discards pending filler and an error discards the rest of an answer.
+FILLER = 0
+ANSWER = 1
+ERROR = 2
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: tuple
+    priority: int = field(compare=False)
+    generation: int = field(compare=False)
+    text: Optional[str] = field(default=None, compare=False)
+    audio: Optional[sa.WaveObject] = field(default=None, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+    done: threading.Event = field(default_factory=threading.Event, compare=False)
+
+
+class AudioScheduler:
+    """
+    Single owner of the audio device.
+    - One long-lived worker plays jobs one at a time: highest priority first, FIFO within a priority.
+    - Jobs may carry text (synthesized lazily, so dropped filler never costs CPU) or ready audio.
+    - cancel() is the barge-in hook: clears the queue and stops whatever is playing.
+    """
+
+    def __init__(self, tts):
+        self.tts = tts
+        self.generation = 0
+        self._heap: list[_Job] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._current: Optional[_Job] = None
+        self._play_obj: Optional[sa.PlayObject] = None
+        self.on_play: Optional[Callable[[int], None]] = None  # called with the priority as playback starts
+        self._worker = threading.Thread(target=self._loop, daemon=True)
+        self._worker.start()
+
+    # ---------- Submit ----------
+    def submit(self, text: Optional[str] = None, audio: Optional[sa.WaveObject] = None,
+               priority: int = ANSWER) -> threading.Event:
+        """Queue text or audio. Returns an Event set once it has played (or been dropped)."""
+        with self._cv:
+            self._drop_queued(lambda j: j.priority < priority)
+            job = _Job((-priority, next(self._seq)), priority, self.generation, text=text, audio=audio)
+            heapq.heappush(self._heap, job)
+            self._cv.notify()
+            return job.done
+
+    def say(self, text: str, priority: int = ANSWER, block: bool = False) -> threading.Event:
+        done = self.submit(text=text, priority=priority)
+        if block:
+            done.wait()
+        return done
+
+    # ---------- Cancel / drop ----------
+    def drop(self, priority: int = FILLER) -> None:
+        """Drop queued and playing jobs at or below `priority` (e.g. stale filler)."""
+        with self._cv:
+            self._drop_queued(lambda j: j.priority <= priority)
+            if self._current and self._current.priority <= priority:
+                self._stop_current()
+
+    def cancel(self) -> None:
+        """Barge-in: forget everything queued and stop the current playback."""
+        with self._cv:
+            self.generation += 1
+            self._drop_queued(lambda j: True)
+            if self._current:
+                self._stop_current()
+
+    def _stop_current(self) -> None:
+        self._current.cancelled = True
+        if self._play_obj:
+            self._play_obj.stop()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._heap and self._current is None, timeout)
+
+    def _drop_queued(self, pred) -> None:
+        keep = []
+        for job in self._heap:
+            if pred(job):
+                job.done.set()
+            else:
+                keep.append(job)
+        if len(keep) != len(self._heap):
+            heapq.heapify(keep)
+            self._heap = keep
+
+    # ---------- Worker ----------
+    def _loop(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: self._heap)
+                job = heapq.heappop(self._heap)
+                self._current = job
+            try:
+                self._run(job)
+            except Exception as e:
+                print("audio error ", e)
+            finally:
+                with self._cv:
+                    self._current = None
+                    self._play_obj = None
+                    job.done.set()
+                    self._cv.notify_all()
+
+    def _run(self, job: _Job):
+        audio = job.audio
+        if audio is None:
+            if job.cancelled or job.generation != self.generation:
+                return
+            audio = self.tts.synthesize(job.text)
+        with self._cv:
+            # cancelled or dropped while we were synthesizing
+            if job.cancelled or job.generation != self.generation:
+                return
+            play_obj = self._play_obj = audio.play()
+        if self.on_play:
+            self.on_play(job.priority)
+        play_obj.wait_done()  # stop() from cancel()/drop() releases this early
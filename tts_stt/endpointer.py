@@ -0,0 +1,73 @@
+from typing import List
+
+import numpy as np
+
+
+class EnergyEndpointer:
+    """
+    Cheap energy VAD that runs in front of the recognizer.
+    - frame energies (dBFS) are computed for a whole block of int16 frames at once
+    - speech = energy above an adaptive noise floor, with hysteresis (onset/offset thresholds)
+    - the silence tail needed to end an utterance grows with the noise floor: quiet rooms end
+      turns quickly, noisy rooms (where the energy decision is shakier) wait longer
+    """
+
+    def __init__(
+        self,
+        onset_db: float = 10.0,
+        offset_db: float = 6.0,
+        min_tail: float = 0.45,
+        quiet_floor_db: float = -60.0,
+        noisy_floor_db: float = -35.0,
+        floor_alpha: float = 0.05,
+    ):
+        self.onset_db = onset_db
+        self.offset_db = offset_db
+        self.min_tail = min_tail
+        self.quiet_floor_db = quiet_floor_db
+        self.noisy_floor_db = noisy_floor_db
+        self.floor_alpha = floor_alpha
+        self.floor_db = None
+        self.in_speech = False
+
+    @staticmethod
+    def frame_db(frames: List[bytes]) -> np.ndarray:
+        """RMS level of every frame in dBFS, one vectorized pass over the concatenated block."""
+        lengths = np.fromiter((len(f) // 2 for f in frames), dtype=np.int64, count=len(frames))
+        samples = np.frombuffer(b"".join(frames), dtype=np.int16).astype(np.float32)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        energy = np.add.reduceat(samples * samples, starts) if samples.size else np.zeros(len(frames))
+        mean_sq = energy / np.maximum(lengths, 1)
+        return 10.0 * np.log10(mean_sq / (32768.0 ** 2) + 1e-10)
+
+    def classify(self, frames: List[bytes]) -> np.ndarray:
+        """Speech/non-speech flag per frame; also tracks the noise floor."""
+        if not frames:
+            return np.zeros(0, dtype=bool)
+        db = self.frame_db(frames)
+        if self.floor_db is None:
+            self.floor_db = float(np.min(db))
+
+        onset = db > self.floor_db + self.onset_db
+        hold = db > self.floor_db + self.offset_db
+        speech = np.empty(len(frames), dtype=bool)
+        state = self.in_speech
+        # hysteresis is inherently sequential, but it is just two boolean lookups per frame
+        for i in range(len(frames)):
+            state = bool(onset[i]) or (state and bool(hold[i]))
+            speech[i] = state
+        self.in_speech = state
+
+        quiet = db[~speech]
+        if quiet.size:
+            self.floor_db += self.floor_alpha * (float(quiet.mean()) - self.floor_db)
+        # a sudden drop in level is a better floor estimate than the average
+        self.floor_db = float(np.clip(min(self.floor_db, float(db.min())), -90.0, -20.0))
+        return speech
+
+    def silence_tail(self, max_tail: float) -> float:
+        """Trailing silence that ends a turn, between min_tail and max_tail depending on noise."""
+        span = self.noisy_floor_db - self.quiet_floor_db
+        noise = 0.0 if self.floor_db is None else (self.floor_db - self.quiet_floor_db) / span
+        noise = min(1.0, max(0.0, noise))
+        return self.min_tail + (max(max_tail, self.min_tail) - self.min_tail) * noise
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+# one writer for every cache: disk writes never run on the synthesis/playback threads
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phrase-cache")
+
+
+class Pcm(NamedTuple):
+    data: bytes
+    channels: int
+    sample_width: int
+    sample_rate: int
+
+
+class PhraseCache:
+    """
+    Content-addressed cache of synthesized phrases.
+    - memory: LRU of `max_items` PCM buffers
+    - disk (optional): one WAV per phrase under `disk_dir`, survives restarts. Only phrases put
+      with persist=True (greeting, fillers, booking tails) go there, so free-form LLM sentences
+      never cause SD-card writes; written on a background thread, capped at max_disk_bytes
+      (least recently used files go first)
+    Keys are sha1(namespace + text), the namespace being the voice model so voices never mix.
+    """
+
+    def __init__(self, max_items: int = 256, disk_dir: Optional[str] = None, namespace: str = "",
+                 max_disk_bytes: int = 32 * 1024 * 1024):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.namespace = namespace
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Pcm]" = OrderedDict()
+        self._files: "OrderedDict[str, int]" = OrderedDict()   # disk key -> size, oldest use first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha1(f"{self.namespace}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Pcm]:
+        k = self.key(text)
+        with self._lock:
+            pcm = self._items.get(k)
+            if pcm is not None:
+                self._items.move_to_end(k)
+                self.hits += 1
+                return pcm
+        pcm = self._read_disk(k)
+        with self._lock:
+            if pcm is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(k, pcm)
+        return pcm
+
+    def put(self, text: str, pcm: Pcm, persist: bool = False) -> None:
+        k = self.key(text)
+        with self._lock:
+            self._remember(k, pcm)
+            if not (persist and self.disk_dir) or k in self._files:
+                return
+        _writer.submit(self._write_disk, k, pcm)
+
+    def __contains__(self, text: str) -> bool:
+        k = self.key(text)
+        with self._lock:
+            return k in self._items or k in self._files
+
+    def _remember(self, k: str, pcm: Pcm) -> None:
+        self._items[k] = pcm
+        self._items.move_to_end(k)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    # ---------- disk tier ----------
+    def _disk_path(self, k: str) -> str:
+        return os.path.join(self.disk_dir, f"{k}.wav")
+
+    def _scan_disk(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            if name.endswith(".tmp"):
+                os.remove(path)   # left over from a crash mid-write
+            elif name.endswith(".wav"):
+                st = os.stat(path)
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, k, size in sorted(entries):
+            self._files[k] = size
+            self._disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # caller holds the lock
+        while self._disk_bytes > self.max_disk_bytes and self._files:
+            k, size = self._files.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._disk_path(k))
+            except OSError:
+                pass
+
+    def _read_disk(self, k: str) -> Optional[Pcm]:
+        with self._lock:
+            if k not in self._files:
+                return None
+            self._files.move_to_end(k)
+        path = self._disk_path(k)
+        try:
+            with wave.open(path, "rb") as wav_file:
+                return Pcm(wav_file.readframes(wav_file.getnframes()), wav_file.getnchannels(),
+                           wav_file.getsampwidth(), wav_file.getframerate())
+        except (OSError, EOFError, wave.Error):
+            return None
+
+    def _write_disk(self, k: str, pcm: Pcm) -> None:
+        with self._lock:
+            if k in self._files:   # queued twice before the first write landed
+                return
+        path = self._disk_path(k)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with wave.open(tmp, "wb") as wav_file:
+                wav_file.setnchannels(pcm.channels)
+                wav_file.setsampwidth(pcm.sample_width)
+                wav_file.setframerate(pcm.sample_rate)
+                wav_file.writeframes(pcm.data)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except OSError as e:
+            print("phrase cache write failed ", e)
+            return
+        with self._lock:
+            self._files[k] = os.path.getsize(path)
+            self._disk_bytes += self._files[k]
+            self._evict_disk()
@@ -0,0 +1,132 @@
+from math import gcd
+from typing import List
+
+import numpy as np
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+
+    audioop = None
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (in_rate -> out_rate) for mono int16 audio.
+    - windowed-sinc low-pass split into `up` polyphase branches of `taps` coefficients
+    - every call processes a whole block with one gather + multiply-sum
+    - the last `taps - 1` input samples and the output position are carried between calls,
+      so feeding 20ms frames or 2s blocks gives the same samples
+    Fallback for Python 3.13+, where audioop.ratecv is gone; see make_resampler().
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps: int = 24, cutoff: float = 0.9):
+        g = gcd(in_rate, out_rate)
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.up, self.down = out_rate // g, in_rate // g
+        self.taps = taps
+
+        # prototype filter at the upsampled rate, cut at `cutoff` of the lower Nyquist
+        n = taps * self.up
+        fc = cutoff * 0.5 * min(in_rate, out_rate) / (in_rate * self.up)
+        m = np.arange(n) - (n - 1) / 2.0
+        h = 2.0 * fc * np.sinc(2.0 * fc * m) * np.kaiser(n, 8.0)
+        h *= self.up / h.sum() if h.sum() else 1.0
+        # phases[p, k] multiplies x[base - taps + 1 + k] for outputs that land on phase p
+        self.phases = np.ascontiguousarray(h.reshape(taps, self.up).T[:, ::-1], dtype=np.float32)
+
+        self._hist = np.zeros(taps - 1, dtype=np.float32)
+        self._n_in = 0   # input samples consumed so far
+        self._n_out = 0  # output samples produced so far
+
+    def process(self, data: bytes) -> bytes:
+        out, _ = self._process(np.frombuffer(data, dtype=np.int16))
+        return out.tobytes()
+
+    def process_frames(self, frames: List[bytes]) -> List[bytes]:
+        """Resample a block of frames in one pass; output is split back along the input frames."""
+        if not frames:
+            return []
+        lengths = np.fromiter((len(f) // 2 for f in frames), dtype=np.int64, count=len(frames))
+        out, base = self._process(np.frombuffer(b"".join(frames), dtype=np.int16))
+        # an output sample belongs to the input frame holding its newest input sample
+        ends = np.cumsum(lengths)
+        cuts = np.searchsorted(base, ends, side="left")[:-1]
+        return [chunk.tobytes() for chunk in np.split(out, cuts)]
+
+    def _process(self, x: np.ndarray):
+        start = self._n_in
+        buf = np.concatenate((self._hist, x.astype(np.float32)))
+        self._n_in += x.size
+
+        # outputs whose newest input sample is already available
+        # output n needs input floor(n * down / up), so n <= (n_in * up - 1) // down
+        last = (self._n_in * self.up - 1) // self.down if self._n_in else -1
+        n = np.arange(self._n_out, last + 1, dtype=np.int64)
+        self._n_out = last + 1
+        pos = n * self.down
+        base = pos // self.up                  # absolute index of the newest input sample
+        phase = pos - base * self.up
+        # window i of buf covers absolute inputs [start - taps + 1 + i, start + i]
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+        y = np.einsum("nk,nk->n", windows[base - start], self.phases[phase])
+
+        self._hist = buf[-(self.taps - 1):] if self.taps > 1 else self._hist
+        out = np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+        return out, base - start
+
+
+class RateCvResampler:
+    """Stateful audioop.ratecv for one mono int16 stream, same interface as PolyphaseResampler."""
+
+    def __init__(self, in_rate: int, out_rate: int):
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self._state = None
+
+    def process(self, data: bytes) -> bytes:
+        data, self._state = audioop.ratecv(data, 2, 1, self.in_rate, self.out_rate, self._state)
+        return data
+
+    def process_frames(self, frames: List[bytes]) -> List[bytes]:
+        return [self.process(f) for f in frames]
+
+
+def make_resampler(in_rate: int, out_rate: int):
+    """
+    audioop.ratecv where it exists: on 20ms capture frames it costs ~1/4 of the NumPy path
+    (see the benchmark below). The polyphase filter (anti-aliased) covers Python 3.13+.
+    """
+    if audioop is not None:
+        return RateCvResampler(in_rate, out_rate)
+    return PolyphaseResampler(in_rate, out_rate)
+
+
+if __name__ == "__main__":
+    # benchmark: 60s of speech-band noise, per-frame audioop.ratecv vs numpy polyphase
+    import time
+
+    seconds = 60
+    for rate in (44100, 48000):
+        rng = np.random.default_rng(0)
+        audio = (rng.normal(0, 3000, rate * seconds)).astype(np.int16)
+        frame = max(256, int(rate * 0.02))
+        frames = [audio[i:i + frame].tobytes() for i in range(0, audio.size, frame)]
+
+        if audioop:
+            state, t0 = None, time.perf_counter()
+            for f in frames:
+                _, state = audioop.ratecv(f, 2, 1, rate, 16000, state)
+            dt = time.perf_counter() - t0
+            print(f"{rate}->16000 audioop.ratecv per 20ms frame : {dt * 1000 / seconds:7.2f} ms CPU per s of audio")
+
+        for block in (1, 10):
+            rs, t0 = PolyphaseResampler(rate, 16000), time.perf_counter()
+            for i in range(0, len(frames), block):
+                rs.process_frames(frames[i:i + block])
+            dt = time.perf_counter() - t0
+            print(f"{rate}->16000 numpy polyphase, {block * 20:4d}ms blocks : {dt * 1000 / seconds:7.2f} ms CPU per s of audio")
+
+        # sanity: a 1 kHz tone keeps its level
+        t = np.arange(rate) / rate
+        tone = (10000 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16)
+        out = np.frombuffer(PolyphaseResampler(rate, 16000).process(tone.tobytes()), dtype=np.int16)
+        print(f"  1kHz tone rms in/out: {tone.std():.0f}/{out[100:].std():.0f}, samples {tone.size}->{out.size}")
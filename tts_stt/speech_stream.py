@@ -0,0 +1,134 @@
+import queue
+import re
+import threading
+from collections import deque
+from typing import Deque, List, Optional
+
+from tts_stt.audio_scheduler import ANSWER
+
+# sentence boundary: terminal punctuation followed by whitespace, or a line break.
+# Titles in doctor names ("Dr. Aisha Khan") are not boundaries.
+_SENTENCE_END = re.compile(r"(?<!\bDr\.)(?<!\bMr\.)(?<!\bMs\.)(?<!\bMrs\.)(?<=[.!?…])\s+|\n+")
+
+_DONE = object()
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+class SentenceChunker:
+    """
+    Turns a token stream into speakable sentences.
+    - Short fragments ("Okay.") are merged with the next sentence so Piper gets enough context.
+    - Everything from `stop_marker` onwards is swallowed (the BOOKING_CONFIRMATION block is
+      replaced by a formatted message, it should never be read out).
+    """
+
+    def __init__(self, min_chars: int = 20, stop_marker: Optional[str] = "BOOKING_CONFIRMATION"):
+        self.min_chars = min_chars
+        self.stop_marker = stop_marker
+        self.stopped = False
+        self._buf = ""
+
+    def feed(self, token: str) -> List[str]:
+        if self.stopped:
+            return []
+        self._buf += token.replace("*", "")
+        if self.stop_marker and self.stop_marker in self._buf:
+            self._buf = self._buf.split(self.stop_marker, 1)[0]
+            self.stopped = True
+            rest = self.flush()
+            return [rest] if rest else []
+
+        parts = _SENTENCE_END.split(self._buf)
+        # last part has no terminator yet; keep buffering it
+        self._buf = parts.pop()
+        sentences, pending = [], ""
+        for part in parts:
+            pending = f"{pending} {part}".strip() if pending else part.strip()
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            self._buf = f"{pending} {self._buf}" if self._buf else pending + " "
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return rest or None
+
+
+class SpeechStream:
+    """
+    Speak an LLM response while it is still streaming.
+
+        speech = SpeechStream(tts)
+        for token in resp.response_gen:
+            speech.feed(token)
+        speech.close(); speech.wait()
+
+    Sentences are synthesized with `tts.synthesize` on a worker and handed to the tts
+    AudioScheduler, which plays them back-to-back. At most `max_pending_audio` synthesized
+    sentences wait for playback, so synthesis never runs far ahead. A scheduler cancel()
+    (barge-in) stops the stream.
+    """
+
+    def __init__(self, tts, max_pending_audio: int = 2, min_chars: int = 20, priority: int = ANSWER):
+        self.tts = tts
+        self.scheduler = tts.scheduler
+        self.priority = priority
+        self.max_pending_audio = max_pending_audio
+        self.chunker = SentenceChunker(min_chars=min_chars)
+        self._generation = self.scheduler.generation
+        self._text_q: "queue.Queue" = queue.Queue()
+        self._pending: Deque[threading.Event] = deque()
+        self.spoken: List[str] = []
+        self._synth_thread = threading.Thread(target=self._synth_loop, daemon=True)
+        self._synth_thread.start()
+
+    @property
+    def stopped(self) -> bool:
+        """True once the stop marker showed up in the stream."""
+        return self.chunker.stopped
+
+    @property
+    def cancelled(self) -> bool:
+        return self.scheduler.generation != self._generation
+
+    def feed(self, token: str) -> None:
+        for sentence in self.chunker.feed(token):
+            self._text_q.put(sentence)
+
+    def close(self) -> None:
+        rest = self.chunker.flush()
+        if rest:
+            self._text_q.put(rest)
+        self._text_q.put(_DONE)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until every sentence has been played (or dropped)."""
+        self._synth_thread.join(timeout)
+        for done in list(self._pending):
+            done.wait(timeout)
+
+    # ---------- worker ----------
+    def _synth_loop(self):
+        while True:
+            sentence = self._text_q.get()
+            if sentence is _DONE:
+                return
+            if self.cancelled:
+                continue
+            # backpressure: don't synthesize further ahead than max_pending_audio
+            while len(self._pending) >= self.max_pending_audio:
+                self._pending.popleft().wait()
+            try:
+                audio = self.tts.synthesize(sentence)
+            except Exception as e:
+                print("tts error ", e)
+                continue
+            if self.cancelled:
+                continue
+            self.spoken.append(sentence)
+            self._pending.append(self.scheduler.submit(audio=audio, priority=self.priority))
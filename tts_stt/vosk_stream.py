@@ -0,0 +1,261 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import pyaudio
+from vosk import KaldiRecognizer
+
+from tts_stt.endpointer import EnergyEndpointer
+from tts_stt.resampler import make_resampler
+
+
+@dataclass
+class Utterance:
+    text: str
+    duration: float  # seconds of audio from first recognized speech to the endpoint
+    ended: float     # time.time() the endpoint fired
+    silence: float = 0.0  # seconds of trailing silence it took to fire (end of speech = ended - silence)
+
+
+class AudioRing:
+    """
+    Fixed-size ring of audio frames with a monotonically increasing write index.
+    One capture thread appends, readers follow with their own cursor; a reader that
+    falls more than `maxlen` frames behind skips to the oldest frame still held.
+    """
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._frames: deque = deque(maxlen=maxlen)
+        self._next = 0  # index of the next frame to be written
+        self._cv = threading.Condition()
+
+    @property
+    def head(self) -> int:
+        with self._cv:
+            return self._next
+
+    def append(self, frame: bytes) -> None:
+        with self._cv:
+            self._frames.append(frame)
+            self._next += 1
+            self._cv.notify_all()
+
+    def read_from(self, cursor: int, timeout: Optional[float] = None) -> Tuple[List[bytes], int]:
+        """Frames written since `cursor` (waits up to `timeout` for at least one) and the new cursor."""
+        with self._cv:
+            self._cv.wait_for(lambda: self._next > cursor, timeout)
+            oldest = self._next - len(self._frames)
+            cursor = max(cursor, oldest)
+            frames = list(self._frames)[cursor - oldest:]
+            return frames, self._next
+
+
+class VoskStream:
+    """
+    Always-on microphone -> Vosk pipeline.
+    - capture thread: opens the input stream ONCE and keeps a few seconds of raw device
+      audio in an AudioRing, so nothing said before a turn starts is lost
+    - recognizer thread: follows the ring, runs the EnergyEndpointer over each block, feeds
+      Kaldi only from a speech onset to the adaptive silence tail, puts the text on
+      `utterances` and resets the KaldiRecognizer so every utterance starts from a clean state
+
+    pause()/resume() mute the recognizer (e.g. while the assistant talks); resume() rewinds
+    `preroll` seconds so a user who starts a little early is not clipped.
+    `on_speech_start` fires once per utterance when speech is first recognized (barge-in hook).
+    """
+
+    def __init__(
+        self,
+        model,
+        pa: pyaudio.PyAudio,
+        device_index: Optional[int],
+        device_rate: int,
+        rec_rate: int = 16000,
+        frames_per_buffer: Optional[int] = None,
+        ring_seconds: float = 5.0,
+        preroll: float = 0.3,
+        silence_timeout: float = 1.0,  # longest silence tail; quieter rooms end turns sooner
+        max_duration: float = 10.0,
+    ):
+        self.pa = pa
+        self.device_index = device_index
+        self.device_rate = device_rate
+        self.rec_rate = rec_rate
+        # ~20ms frames are stable across devices
+        self.frames_per_buffer = frames_per_buffer or max(256, int(device_rate * 0.02))
+        self.frame_seconds = self.frames_per_buffer / float(device_rate)
+        # raw device audio goes into the ring; the recognizer resamples whole drained blocks
+        self.resampler = make_resampler(device_rate, rec_rate) if device_rate != rec_rate else None
+        self.recognizer = KaldiRecognizer(model, rec_rate)
+        self.ring = AudioRing(maxlen=max(1, int(ring_seconds / self.frame_seconds)))
+        self.preroll_frames = int(preroll / self.frame_seconds)
+        self.endpointer = EnergyEndpointer()
+        # ~60ms of continuous energy before an utterance (and barge-in) starts
+        self.onset_frames = max(1, int(round(0.06 / self.frame_seconds)))
+        self.silence_timeout = silence_timeout
+        self.max_duration = max_duration
+        self.utterances: "queue.Queue[Utterance]" = queue.Queue()
+        self.on_speech_start: Optional[Callable[[], None]] = None
+        self.last_utterance: Optional[Utterance] = None  # timing of the last result, for turn tracing
+
+        self._running = False
+        self._listening = threading.Event()
+        self._listening.set()
+        self._rewind = False
+        self._in_speech = False  # the recognizer is between an onset and its endpoint
+        self._threads: List[threading.Thread] = []
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._recognize_loop, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._listening.set()  # wake a paused recognizer so it can exit
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def pause(self) -> None:
+        self._listening.clear()
+
+    def resume(self) -> None:
+        if not self._listening.is_set():
+            self.clear()  # finished before the mute: an answer to a question already handled
+            self._rewind = True
+            self._listening.set()
+
+    def next_utterance(self, timeout: Optional[float] = None) -> Optional[Utterance]:
+        """
+        The next utterance, or None if nobody started speaking within `timeout`.
+        - someone already talking when the timeout hits is waited for (max_duration caps it), so
+          speech near the end of a listen window is neither clipped nor left for the next call
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                self.last_utterance = self.utterances.get(timeout=remaining)
+                return self.last_utterance
+            except queue.Empty:
+                if not self._in_speech:
+                    self.last_utterance = None
+                    return None
+                deadline = time.monotonic() + 0.5
+
+    def clear(self) -> None:
+        """Drop utterances nobody asked for yet."""
+        while True:
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                return
+
+    # ---------- workers ----------
+    def _capture_loop(self):
+        stream = self.pa.open(
+            rate=self.device_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.frames_per_buffer,
+        )
+        stream.start_stream()
+        print(f"Listening on device #{self.device_index} at {self.device_rate} Hz...")
+        try:
+            while self._running:
+                self.ring.append(stream.read(self.frames_per_buffer, exception_on_overflow=False))
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def _recognize_loop(self):
+        cursor = self.ring.head
+        text, started, last_voice = "", None, None
+        # frames before the VAD onset; fed to Kaldi once speech starts so onsets aren't clipped
+        lead_in: deque = deque(maxlen=self.preroll_frames + self.onset_frames)
+        run = 0  # consecutive speech frames while waiting for an onset
+
+        def finish(t: float):
+            nonlocal text, started, last_voice
+            tail = json.loads(self.recognizer.FinalResult()).get("text")
+            if tail:
+                text += " " + tail
+            if text.strip():
+                self.utterances.put(Utterance(text.strip(), t - (started or t), time.time(),
+                                              t - (last_voice or t)))
+            self.recognizer.Reset()
+            text, started, last_voice = "", None, None
+            self._in_speech = False
+
+        def accept(data: bytes):
+            nonlocal text
+            if self.recognizer.AcceptWaveform(data):
+                result = json.loads(self.recognizer.Result())
+                if result.get("text"):
+                    text += " " + result["text"]
+
+        while self._running:
+            if not self._listening.is_set():
+                # muted: drop the partial utterance, the recognizer starts clean on resume
+                if started is not None or text:
+                    self.recognizer.Reset()
+                    text, started, last_voice = "", None, None
+                    self._in_speech = False
+                lead_in.clear()
+                run = 0
+                self._listening.wait()
+                if self._rewind:
+                    cursor = max(cursor, self.ring.head - self.preroll_frames)
+                    self._rewind = False
+                continue
+
+            frames, cursor = self.ring.read_from(cursor, timeout=0.5)
+            if not frames:
+                continue
+            if self.resampler:
+                frames = self.resampler.process_frames(frames)
+            speech = self.endpointer.classify(frames)
+            tail = self.endpointer.silence_tail(self.silence_timeout)
+            # endpointing runs on audio time (frame index), not wall time, so a backlog
+            # replayed after resume() is timed correctly
+            first = cursor - len(frames)
+            for i, data in enumerate(frames):
+                t = (first + i) * self.frame_seconds
+                if started is None:
+                    # idle: Kaldi sees nothing until the VAD reports a real onset
+                    lead_in.append(data)
+                    run = run + 1 if speech[i] else 0
+                    if run < self.onset_frames:
+                        continue
+                    started = last_voice = t
+                    self._in_speech = True
+                    run = 0
+                    if self.on_speech_start:
+                        self.on_speech_start()
+                    for buffered in lead_in:
+                        accept(buffered)
+                    lead_in.clear()
+                    continue
+
+                accept(data)
+                if speech[i]:
+                    last_voice = t
+                if t - last_voice > tail:
+                    finish(t)
+                elif t - started > self.max_duration:
+                    print("Max duration reached, stopping...")
+                    finish(t)
@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Turn:
+    """
+    Timeline of one conversational turn; all times are perf_counter() values, reported as ms from t0.
+    - t0 is when the user stopped speaking (not when the code got the text), so STT endpointing counts
+    - span(name) / add(name, start, end): a stage; the same name may occur several times (summed)
+    - mark(name): a milestone, first call wins (first_audio, ...)
+    - token(): one streamed LLM token; gives time-to-first-token and decode tokens/s
+    Stages run on several threads (tts synthesis, playback), so they can overlap.
+    """
+
+    def __init__(self, turn_id: str, t0: Optional[float] = None, **attrs):
+        self.id = turn_id
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.started = time.time() - (time.perf_counter() - self.t0)
+        self.attrs = attrs
+        self.spans: List[Tuple[str, float, float]] = []
+        self.marks: Dict[str, float] = {}
+        self.tokens = 0
+        self._first_token: Optional[float] = None
+        self._last_token: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def add(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.spans.append((name, start, end))
+
+    def mark(self, name: str, at: Optional[float] = None) -> None:
+        with self._lock:
+            self.marks.setdefault(name, at if at is not None else time.perf_counter())
+
+    def token(self) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self.tokens += 1
+            if self._first_token is None:
+                self._first_token = now
+            self._last_token = now
+
+    def record(self) -> Dict:
+        def ms(t: Optional[float]) -> Optional[float]:
+            return None if t is None else round((t - self.t0) * 1000, 1)
+
+        with self._lock:
+            stages: Dict[str, float] = {}
+            for name, start, end in self.spans:
+                stages[name] = round(stages.get(name, 0.0) + (end - start) * 1000, 1)
+            decode_s = (self._last_token - self._first_token) if self.tokens > 1 else 0.0
+            return {
+                "turn": self.id,
+                "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "total_ms": ms(time.perf_counter()),
+                "ttft_ms": ms(self._first_token),
+                "ttfa_ms": ms(self.marks.get("first_audio")),
+                "tokens": self.tokens,
+                # decode rate only: prefill is already in ttft
+                "tok_per_s": round((self.tokens - 1) / decode_s, 1) if decode_s > 0 else None,
+                "stages": stages,
+                "marks": {name: ms(t) for name, t in self.marks.items()},
+                "spans": [{"name": n, "start_ms": ms(s), "ms": round((e - s) * 1000, 1)} for n, s, e in self.spans],
+                **self.attrs,
+            }
+
+
+def trace_span(turn: Optional[Turn], name: str):
+    """turn.span(name), or a no-op when nobody is tracing."""
+    return turn.span(name) if turn is not None else nullcontext()
+
+
+def format_record(record: Dict) -> str:
+    head = [f"total {record['total_ms']:.0f} ms"]
+    for key, label in (("ttft_ms", "ttft"), ("ttfa_ms", "ttfa")):
+        if record.get(key) is not None:
+            head.append(f"{label} {record[key]:.0f} ms")
+    if record.get("tok_per_s"):
+        head.append(f"{record['tok_per_s']} tok/s")
+    stages = ", ".join(f"{name} {v:.0f}" for name, v in record["stages"].items())
+    return f"turn {record['turn']}: " + ", ".join(head) + (f" | {stages}" if stages else "")
+
+
+class Tracer:
+    """
+    Starts and finishes turns and hands finished records to the exporters.
+    - current is the turn in progress; add()/mark() record on it from code that has no handle on the
+      turn (audio threads) and do nothing between turns
+    - echo prints one summary line per turn
+    """
+
+    def __init__(self, exporters: Iterable = (), echo: bool = True):
+        self.exporters = list(exporters)
+        self.echo = echo
+        self.current: Optional[Turn] = None
+
+    def start(self, t0: Optional[float] = None, **attrs) -> Turn:
+        self.current = Turn(uuid.uuid4().hex[:8], t0, **attrs)
+        return self.current
+
+    def finish(self, turn: Optional[Turn] = None, **attrs) -> Optional[Dict]:
+        turn = turn or self.current
+        if turn is None:
+            return None
+        if turn is self.current:
+            self.current = None
+        turn.attrs.update(attrs)
+        record = turn.record()
+        if self.echo:
+            print(format_record(record))
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                print(f"trace export failed ({type(exporter).__name__}):", e)
+        return record
+
+    def add(self, name: str, start: float, end: float) -> None:
+        turn = self.current
+        if turn is not None:
+            turn.add(name, start, end)
+
+    def mark(self, name: str, at: Optional[float] = None) -> None:
+        turn = self.current
+        if turn is not None:
+            turn.mark(name, at)
+
+
+# ---------- Exporters ----------
+class JsonlExporter:
+    """One JSON line per turn, for offline analysis (jq, pandas)."""
+
+    def __init__(self, path: str = "storage/turn_traces.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _metrics(record: Dict) -> List[Tuple[str, float]]:
+    values = [("total", record["total_ms"]), ("ttft", record.get("ttft_ms")), ("ttfa", record.get("ttfa_ms"))]
+    values += list(record["stages"].items())
+    return [(name, v) for name, v in values if v is not None]
+
+
+class HistogramExporter:
+    """
+    In-process latency histograms per metric (total, ttft, ttfa and every stage name).
+    - fixed buckets, cheap enough to keep forever; percentiles come from the last `window` samples
+    - summary() for logs / the server's metrics request, prometheus() for scraping
+    """
+
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = BUCKETS_MS, window: int = 500):
+        self.buckets_ms = tuple(buckets_ms)
+        self.window = window
+        self.turns = 0
+        self.tokens = 0
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+        self._recent: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict) -> None:
+        with self._lock:
+            self.turns += 1
+            self.tokens += record.get("tokens") or 0
+            for name, ms in _metrics(record):
+                counts = self._counts.setdefault(name, [0] * (len(self.buckets_ms) + 1))
+                i = next((i for i, b in enumerate(self.buckets_ms) if ms <= b), len(self.buckets_ms))
+                counts[i] += 1
+                self._sums[name] = self._sums.get(name, 0.0) + ms
+                self._recent.setdefault(name, deque(maxlen=self.window)).append(ms)
+
+    def summary(self) -> Dict[str, Dict]:
+        out = {}
+        with self._lock:
+            for name, recent in self._recent.items():
+                ordered = sorted(recent)
+                pct = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+                out[name] = {"count": sum(self._counts[name]), "p50_ms": pct(0.5), "p95_ms": pct(0.95),
+                             "max_ms": ordered[-1]}
+        return out
+
+    def prometheus(self, prefix: str = "clinic") -> str:
+        lines = [f"# HELP {prefix}_turns_total Conversation turns traced.",
+                 f"# TYPE {prefix}_turns_total counter",
+                 f"{prefix}_turns_total {self.turns}",
+                 f"# HELP {prefix}_llm_tokens_total LLM tokens streamed.",
+                 f"# TYPE {prefix}_llm_tokens_total counter",
+                 f"{prefix}_llm_tokens_total {self.tokens}",
+                 f"# HELP {prefix}_turn_latency_seconds Per-turn latency by stage.",
+                 f"# TYPE {prefix}_turn_latency_seconds histogram"]
+        metric = f"{prefix}_turn_latency_seconds"
+        with self._lock:
+            for name, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets_ms, counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {sum(counts)}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {self._sums[name] / 1000:.3f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {sum(counts)}')
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter(HistogramExporter):
+    """The histograms, also served as Prometheus text at http://host:port/metrics (daemon thread)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108, **kwargs):
+        super().__init__(**kwargs)
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # one line per scrape would drown the console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics").start()
+        print(f"turn metrics on http://{host}:{port}/metrics")
+
+    def close(self) -> None:
+        self.server.shutdown()
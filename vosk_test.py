@@ -1,53 +1,46 @@
-import json
-import time
+from typing import Callable, Optional
 import pyaudio
-from vosk import Model, KaldiRecognizer
+from vosk import Model
+from tts_stt.vosk_stream import Utterance, VoskStream
 
 class VoskSpeech:
     def __init__(self, path_to_model):
         model = Model(path_to_model)
-        self.recognizer = KaldiRecognizer(model, 16000)
         self.mic = pyaudio.PyAudio()
+        # default input device at 16k, mic kept open between turns
+        self.stream = VoskStream(model, self.mic, None, 16000, rec_rate=16000, frames_per_buffer=4096)
 
-    def get_text_from_speech(self, silence_timeout=1.0, max_duration=10.0):
-        stream = self.mic.open(rate=16000, channels=1, format=pyaudio.paInt16, input=True, frames_per_buffer=4096)
-        stream.start_stream()
-
-        print("Listening... Speak now.")
+    @property
+    def last_utterance(self) -> Optional[Utterance]:
+        """Timing of the last result (None after a timeout), for turn tracing."""
+        return self.stream.last_utterance
 
-        start_time = time.time()
-        last_speech_time = None  # Don't set until we actually hear speech
-        full_text = ""
+    @property
+    def on_speech_start(self) -> Optional[Callable[[], None]]:
+        return self.stream.on_speech_start
 
-        while True:
-            data = stream.read(4096, exception_on_overflow=False)
+    @on_speech_start.setter
+    def on_speech_start(self, callback: Optional[Callable[[], None]]):
+        self.stream.on_speech_start = callback
 
-            if self.recognizer.AcceptWaveform(data):
-                result = json.loads(self.recognizer.Result())
-                if result.get("text"):
-                    full_text += " " + result["text"]
-                    last_speech_time = time.time()  # Set only after actual speech
-            else:
-                partial = json.loads(self.recognizer.PartialResult())
-                if partial.get("partial"):
-                    last_speech_time = time.time()
+    def start_listen(self):
+        self.stream.start()
+        self.stream.resume()
 
-            # Don't stop for silence unless speech has started
-            if last_speech_time:
-                if time.time() - last_speech_time > silence_timeout:
-                    print("Silence detected, stopping...")
-                    break
+    def stop_listen(self):
+        self.stream.pause()
+        self.stream.start()  # opens the device once, up front
 
-            # Optional: prevent endless recording
-            if time.time() - start_time > max_duration:
-                print("Max duration reached, stopping...")
-                break
-
-        stream.stop_stream()
-        stream.close()
+    def get_text_from_speech(self, silence_timeout=1.0, max_duration=10.0):
+        self.stream.silence_timeout = silence_timeout
+        self.stream.max_duration = max_duration
+        self.start_listen()
 
-        return full_text.strip()
+        print("Listening... Speak now.")
+        utterance = self.stream.next_utterance(timeout=max_duration + silence_timeout)
+        return utterance.text if utterance else ""
 
 # Example usage:
-recognizer = VoskSpeech("tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4")
-print("Recognized:", recognizer.get_text_from_speech())
+if __name__ == "__main__":
+    recognizer = VoskSpeech("tts_stt/vosk_stt_model/vosk-model-small-en-in-0.4")
+    print("Recognized:", recognizer.get_text_from_speech())